@@ -0,0 +1,50 @@
+# bench_extract_name.py
+# Micro-benchmark: extract_name() / extract_names() vs the previous
+# per-pattern re.search version, on a corpus of greeting answers.
+#   python benchmarks/bench_extract_name.py [--number 2000]
+
+import argparse, os, re, sys, timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lexus_dialog_agent_v3 import NAME_PATTERNS, extract_name, extract_names
+
+# First answers as customers type them
+CORPUS = [
+    "Alex", "alex", "My name is Jordan", "my name is jordan lee", "I'm Sam", "i'm sam!",
+    "I am Priya.", "iam chris", "This is Morgan", "it's Taylor", "its taylor", "Hi, I'm Dana",
+    "hello there, my name is Mary-Jane", "Call me Robin", "Pat here", "o'neil",
+    "hey it's me, Casey", "Good morning! This is Dr. Evans", "I'm just browsing",
+    "name's Riley", "Jamie.", "hi", "Sure, it's Ava", "you can call me Lee",
+    "My name is Jean-Luc Picard", "i am looking for a car", "Hello!!", "Noah?",
+    "this is Olivia speaking", "It's Mia :)",
+]
+
+def _legacy_clean_word(w): return re.sub(r"[^A-Za-z\-' ]", "", w).strip()
+def legacy_extract_name(raw: str) -> str:
+    s = re.sub(r"[\.!\?]+\s*$", "", raw.strip())
+    low = s.lower()
+    for pat in NAME_PATTERNS:
+        m = re.search(pat, low)
+        if m:
+            cand = _legacy_clean_word(m.group(1))
+            parts = [p for p in cand.split() if p]
+            if parts: return parts[0].capitalize()
+    toks = [_legacy_clean_word(t) for t in s.split()]
+    toks = [t for t in toks if t]
+    return toks[-1].capitalize() if toks else "Friend"
+
+def bench(fn, number):
+    t = min(timeit.repeat(lambda: fn(CORPUS), number=number, repeat=5))
+    return t / (number * len(CORPUS)) * 1e6
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--number", type=int, default=2000)
+    args = p.parse_args()
+    old = bench(lambda us: [legacy_extract_name(u) for u in us], args.number)
+    new = bench(extract_names, args.number)
+    print(f"legacy: {old:.2f} us/utterance")
+    print(f"new:    {new:.2f} us/utterance  ({old / new:.1f}x)")
+    diffs = [u for u in CORPUS if legacy_extract_name(u) != extract_name(u)]
+    if diffs:
+        print("utterances parsed differently:", diffs)
@@ -0,0 +1,51 @@
+# bench_family_bucket.py
+# Micro-benchmark: detect_family_bucket() vs the previous per-word regex version.
+#   python benchmarks/bench_family_bucket.py [--number 2000]
+
+import argparse, os, re, sys, timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lexus_dialog_agent_v3 import NUM_WORDS, detect_family_bucket
+
+# Passenger-count answers as customers type them
+CORPUS = [
+    "2", "5", "5+", "4-5", "1-3", "just me", "me and my wife", "usually two",
+    "like 6 people", "i have 5 people in my family", "i often drive two other people",
+    "three plus me", "me and 3 kids", "five or six", "two or three", "a couple",
+    "a couple of friends", "few", "a few coworkers", "four", "seven on weekends",
+    "mostly 1 passenger", "sometimes 8 with the grandparents", "2 adults 2 kids",
+    "my husband and our two dogs", "family of six", "big family", "small group",
+    "it's usually just the two of us", "3", "between 4 and 5", "no more than three",
+    "zero passengers, just commuting", "Six!", "We're a family of FOUR",
+    "one or two", "10 for carpool", "two plus me", "me plus one", "4ish",
+]
+
+def legacy_detect_family_bucket(ans: str):
+    s = ans.strip().lower()
+    nums = [int(x) for x in re.findall(r"\d+", s)]
+    for word, val in NUM_WORDS.items():
+        if re.search(rf"(?<![a-z0-9]){re.escape(word)}(?![a-z0-9])", s):
+            nums.append(val)
+    if not nums:
+        return None
+    n = max(nums)
+    return ">=4" if n >= 4 else "<4"
+
+def bench(fn, number):
+    t = min(timeit.repeat(lambda: [fn(a) for a in CORPUS], number=number, repeat=5))
+    return t / (number * len(CORPUS)) * 1e6
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--number", type=int, default=2000)
+    args = p.parse_args()
+    old = bench(legacy_detect_family_bucket, args.number)
+    new = bench(detect_family_bucket, args.number)
+    print(f"legacy: {old:.2f} us/answer")
+    print(f"new:    {new:.2f} us/answer  ({old / new:.1f}x)")
+    diffs = [(a, legacy_detect_family_bucket(a), detect_family_bucket(a)) for a in CORPUS
+             if legacy_detect_family_bucket(a) != detect_family_bucket(a)]
+    if diffs:
+        print("answers parsed differently (legacy -> new):")
+        for a, o, n in diffs:
+            print(f"  {a!r}: {o} -> {n}")
@@ -0,0 +1,104 @@
+# bench_import.py
+# Startup cost of the dialog modules, against a budget.
+#  - Each module is imported in a fresh interpreter under `python -X importtime`;
+#    the cumulative time of its own line is the figure, median of --runs
+#  - "greeting" times import + start() + a "quit" turn, the whole life of a
+#    session that never reaches the data
+#  - The same again with a catalog --scale times larger (LEXUS_DATA_DIR):
+#    startup must not grow with it; only the first data turn may
+#  - Exits 1 when lexus_dialog_agent_v3 or the greeting is over budget
+#
+#   python benchmarks/bench_import.py [--runs 7] [--budget-ms 30] [--scale 100]
+
+import argparse, compileall, json, os, shutil, statistics, subprocess, sys, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["lexus_parse", "lexus_prompts", "lexus_engine", "lexus_dialog_agent_v3"]
+BUDGET_MS = 30.0
+
+# Timed inside the child: everything from the first import to the reply
+_GREETING = """\
+import time
+t0 = time.perf_counter()
+import lexus_dialog_agent_v3 as agent
+greeting, s = agent.start()
+agent.reply(s, "quit")
+t1 = time.perf_counter()
+agent.reply(s, "Ann")  # first turn that reads the data
+t2 = time.perf_counter()
+print((t1 - t0) * 1e3, (t2 - t1) * 1e3)
+"""
+
+def _run(args, env):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True,
+                          text=True, check=True)
+
+def import_ms(module, env):
+    """Cumulative import time of `module` in a fresh interpreter, in ms."""
+    err = _run(["-X", "importtime", "-c", f"import {module}"], env).stderr
+    for line in err.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"no importtime line for {module}")
+
+def greeting_ms(env):
+    """(import + greeting + quit, first data turn) in a fresh interpreter, in ms."""
+    startup, first = _run(["-c", _GREETING], env).stdout.split()
+    return float(startup), float(first)
+
+def scaled_data(scale, out_dir):
+    """Write a copy of data/ with every model repeated `scale` times under new names."""
+    src = os.path.join(ROOT, "data")
+    with open(os.path.join(src, "catalog.json"), encoding="utf-8") as f:
+        catalog = json.load(f)
+    models, explains, prices = [], {}, {}
+    for i in range(scale):
+        for m in catalog["models"]:
+            name = f"{m['name']}{i}" if i else m["name"]
+            models.append(dict(m, name=name))
+            explains[name] = catalog["explains"].get(m["name"], "")
+            prices[name] = catalog["price_ranges"].get(m["name"], "")
+    with open(os.path.join(out_dir, "catalog.json"), "w", encoding="utf-8") as f:
+        json.dump({"models": models, "explains": explains, "price_ranges": prices}, f)
+    shutil.copy(os.path.join(src, "vocab.json"), out_dir)
+    return len(models)
+
+def measure(envs, runs):
+    """Median timings per env; the envs take turns so machine noise hits them alike."""
+    samples = [{} for _ in envs]
+    for _ in range(runs):
+        for env, got in zip(envs, samples):
+            for m in MODULES:
+                got.setdefault(m, []).append(import_ms(m, env))
+            startup, first = greeting_ms(env)
+            got.setdefault("greeting", []).append(startup)
+            got.setdefault("first data turn", []).append(first)
+    return [{k: statistics.median(v) for k, v in got.items()} for got in samples]
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Import-time budget for the dialog modules")
+    p.add_argument("--runs", type=int, default=7)
+    p.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    p.add_argument("--scale", type=int, default=100, help="catalog multiplier for the growth check")
+    args = p.parse_args()
+
+    # time imports, not bytecode compilation
+    compileall.compile_dir(ROOT, maxlevels=0, quiet=1)
+    env = dict(os.environ)
+    env.pop("LEXUS_DATA_DIR", None)
+    with tempfile.TemporaryDirectory() as tmp:
+        n = scaled_data(args.scale, tmp)
+        base, scaled = measure([env, dict(env, LEXUS_DATA_DIR=tmp)], args.runs)
+
+    print(f"{'':<24} {'catalog':>10} {f'x{args.scale} ({n})':>14}")
+    for name in base:
+        print(f"{name:<24} {base[name]:>8.1f}ms {scaled[name]:>12.1f}ms")
+    over = [(name, r[name]) for r in (base, scaled) for name in ("lexus_dialog_agent_v3", "greeting")
+            if r[name] > args.budget_ms]
+    if over:
+        print(f"\nover the {args.budget_ms:.0f} ms budget:")
+        for name, ms in over:
+            print(f"  {name}: {ms:.1f} ms")
+        sys.exit(1)
+    print(f"\nwithin the {args.budget_ms:.0f} ms budget")
@@ -0,0 +1,277 @@
+# bench_paths.py
+# Every reachable answer path through the dialog, checked and timed.
+#  - Drives reply() depth-first from the greeting with scripted answers: each
+#    choice the current question offers (every body type at the body
+#    question, so the group-size limit is exercised too), plus "help", an
+#    unparseable answer and a typo of the first choice. A turn that leaves
+#    the question where it was is a loop; --loops caps them per path
+#  - Covers the brand-intent decline, the EV decline fallback (rz_confirm
+#    "no" -> the crossover/SUV questions) and clarifications ("Did you
+#    mean ...?" then "yes")
+#  - Checks:
+#      every recommendation is a catalog model with EXPLAINS and PRICE_RANGES
+#      entries
+#      for each body type, the keep-same branch (current body type) and the
+#      people-first branch (group size, then body type) map the same tree
+#      answers to the same model; so do the EV decline and crossover/SUV
+#      every model at a tree leaf is recommended on some path
+#      help and unparseable answers change neither the question nor the slots
+#      group sizes said in a sentence ("three plus me") reach the right
+#      bucket at the people question, and one given earlier is kept
+#  - --random N adds N seeded random walks mixing answers meant for other
+#    questions, budgets and noise; their recommendations get the same data
+#    checks, and reply() must never modify its input or reach an unknown stage
+#  - The full enumeration is timed (best of --repeat) as paths/s and turns/s
+#  - Exits 1 on any failed check
+#
+#   python benchmarks/bench_paths.py [--loops 1] [--random 2000] [--repeat 5] [--json out.json]
+
+import argparse, json, os, random, statistics, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import lexus_dialog_agent_v3 as agent
+from lexus_engine import ALL_BODIES, HANDLERS
+
+SEED = 1234
+NOISE = "qwzx"
+TREE_SLOTS = ("size", "feel", "persona")
+
+def say(mapping, key):
+    """An utterance that parses as `key`: its shortest synonym that does."""
+    for syn in sorted(mapping[key], key=lambda t: (len(t), t)):
+        if agent.norm(syn, mapping) == key:
+            return syn
+    return key
+
+def typo(text):
+    return text[:len(text) // 2] + text[len(text) // 2 + 1:] if len(text) > 3 else text + text[-1]
+
+def choices(kb, s):
+    """The answers the current question offers, as utterances."""
+    stage = s["stage"]
+    if stage == "name":
+        return ["Ann"]
+    if stage in ("intent", "keep_same", "rz_confirm"):
+        return [say(kb.yes_no, "yes"), say(kb.yes_no, "no")]
+    if stage in ("current_type", "body"):
+        return [say(kb.vocab["bodies"], b) for b in ALL_BODIES]
+    if stage == "people":
+        return ["2", "5"]
+    if stage == "ask":
+        attr, _, children = kb.tree["nodes"][s["node"]]
+        return [say(kb.tree_vocab[attr], k) for k in children]
+    raise AssertionError(f"unknown stage {stage!r}")
+
+def loops(kb, s, opts):
+    """Off-script answers: (utterance, whether it must keep the question and slots).
+
+    A typo may be accepted, clarified or re-prompted; the EV question takes
+    anything but yes as a no."""
+    if s["stage"] == "name":
+        return [("help", True), ("friend", True)]
+    return [("help", True), (NOISE, s["stage"] != "rz_confirm"), (typo(opts[0]), False)]
+
+class Checker:
+    def __init__(self, kb):
+        self.kb = kb
+        self.names = set(kb.rendered)
+        self.leaves = {ref for ref in kb.tree["roots"].values() if isinstance(ref, str)}
+        for _, _, children in kb.tree["nodes"]:
+            self.leaves.update(ref for ref in children.values() if isinstance(ref, str))
+        self.tables = {}  # branch -> body -> tree answers -> {model: path}
+        self.reached = set()
+        self.failures = []
+
+    def fail(self, path, msg):
+        if len(self.failures) < 50:
+            self.failures.append(f"{msg}\n    path: {path}")
+
+    def loop(self, path, before, after, text, utterance):
+        if after["stage"] != before["stage"] or after["node"] != before["node"]:
+            self.fail(path, f"{utterance!r} moved {before['stage']} -> {after['stage']}")
+        elif after["slots"] != before["slots"]:
+            self.fail(path, f"{utterance!r} changed the slots: {before['slots']} -> {after['slots']}")
+        if utterance == "help" and not text.endswith(before["prompt"]):
+            self.fail(path, "help did not repeat the question")
+
+    def finished(self, path, s, compare=True):
+        model = s["model"]
+        if model is None:
+            if s["slots"].get("intent") != "no":
+                self.fail(path, "ended without a recommendation")
+            return
+        self.reached.add(model)
+        kb = self.kb
+        if model not in self.names:
+            self.fail(path, f"{model} is not in the catalog")
+        if not kb.explains.get(model):
+            self.fail(path, f"{model} has no EXPLAINS entry")
+        if not kb.price_ranges.get(model):
+            self.fail(path, f"{model} has no PRICE_RANGES entry")
+        if not compare:
+            return
+        slots = s["slots"]
+        branch = "keep same" if slots.get("keep_same") == "yes" else "people first"
+        body = slots.get("body")
+        if slots.get("ev") == "no":
+            body = "electric declined"
+        answers = tuple((k, slots[k]) for k in TREE_SLOTS if k in slots)
+        seen = self.tables.setdefault(branch, {}).setdefault(body, {}).setdefault(answers, {})
+        seen.setdefault(model, path)
+        if len(seen) > 1:
+            self.fail(path, f"{branch}: {body} {dict(answers)} gives {' and '.join(seen)}")
+
+    def coverage(self):
+        for model in sorted(self.leaves - self.reached):
+            self.failures.append(f"tree leaf {model} is never recommended")
+
+    def agreement(self):
+        """Per body type, both branches (and the EV decline, against
+        crossover/SUV) must map the same tree answers to the same models."""
+        def table(branch, body):
+            return {a: sorted(m) for a, m in self.tables.get(branch, {}).get(body, {}).items()}
+        pairs = [(("keep same", b), ("people first", b)) for b in ALL_BODIES]
+        pairs += [((br, "electric declined"), (br, "crossover_suv")) for br in ("keep same", "people first")]
+        compared = 0
+        for left, right in pairs:
+            a, b = table(*left), table(*right)
+            if not a or not b:
+                continue
+            compared += 1
+            for answers in sorted(set(a) | set(b)):
+                if a.get(answers) != b.get(answers):
+                    self.failures.append(f"{' / '.join(left)} vs {' / '.join(right)}: {dict(answers)} "
+                                         f"gives {a.get(answers)} vs {b.get(answers)}")
+        return compared
+
+# (answers after the greeting, group size the dialog must settle on)
+GROUP_PHRASES = [
+    (["Ann", "yes", "no", "three plus me"], ">=4"),
+    (["Ann", "yes", "no", "me and 3 friends"], ">=4"),
+    (["Ann", "yes", "no", "3 + me"], ">=4"),
+    (["Ann", "yes", "no", "like 6 people"], ">=4"),
+    (["Ann", "yes", "no", "two of us"], "<4"),
+    (["Ann", "yes", "no", "a couple"], "<4"),
+    (["Ann", "yes", "no, there are five of us", "2"], ">=4"),
+]
+
+def group_phrases(checker):
+    """Dialog-level group-size answers: the count wins over a synonym."""
+    for answers, want in GROUP_PHRASES:
+        _, s = agent.start(seed=0)
+        for utterance in answers:
+            _, s = agent.reply(s, utterance)
+        got = s["slots"].get("family")
+        if got != want:
+            checker.fail(tuple(answers), f"group size {got!r}, expected {want!r}")
+        elif s["stage"] == "people":
+            checker.fail(tuple(answers), "the people question was asked again")
+
+def enumerate_paths(kb, checker, max_loops):
+    """Depth-first over every path; returns (paths, turns)."""
+    paths = turns = 0
+    greeting, s0 = agent.start(seed=0)
+    stack = [(s0, (), 0)]
+    while stack:
+        s, path, used = stack.pop()
+        opts = choices(kb, s)
+        if s.get("suggest") is not None:
+            opts = opts + [say(kb.yes_no, "yes")]  # take the clarification
+        nexts = [(u, False) for u in opts]
+        if used < max_loops:
+            nexts += loops(kb, s, opts)
+        for utterance, must_stay in nexts:
+            text, after = agent.reply(s, utterance)
+            turns += 1
+            p = path + (utterance,)
+            if checker is not None and must_stay:
+                checker.loop(p, s, after, text, utterance)
+            if after["stage"] == "done":
+                paths += 1
+                if checker is not None:
+                    checker.finished(p, after)
+                continue
+            stayed = after["stage"] == s["stage"] and after["node"] == s["node"]
+            if stayed and used >= max_loops:
+                paths += 1  # loop budget spent; the path ends unfinished
+                continue
+            stack.append((after, p, used + stayed))
+    return paths, turns
+
+def random_walks(kb, checker, n, seed=SEED):
+    """Seeded walks over answers to any question, typos and noise."""
+    rng = random.Random(seed)
+    pool = ["help", NOISE, "Ann", "2", "5", "under 60k", "just me"]
+    for mapping in (kb.yes_no, kb.vocab["bodies"], *kb.tree_vocab.values()):
+        pool += [say(mapping, k) for k in mapping]
+    pool += [typo(u) for u in pool]
+    turns = 0
+    for i in range(n):
+        _, s = agent.start(seed=i)
+        path = ()
+        for _ in range(40):
+            own = choices(kb, s)
+            utterance = rng.choice(own if rng.random() < 0.6 else pool)
+            before = json.dumps(s, sort_keys=True)
+            text, after = agent.reply(s, utterance)
+            turns += 1
+            path += (utterance,)
+            if json.dumps(s, sort_keys=True) != before:
+                checker.fail(path, "reply() modified its input session")
+            if not text:
+                checker.fail(path, "empty reply")
+            if after["stage"] != "done" and after["stage"] not in HANDLERS:
+                checker.fail(path, f"unknown stage {after['stage']!r}")
+            if after["stage"] == "done":
+                # answers given ahead of their question fill slots the
+                # tree never asked, so walks are not compared across branches
+                checker.finished(path, after, compare=False)
+                break
+            s = after
+    return turns
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Exhaustive dialog path coverage, checked and timed")
+    p.add_argument("--loops", type=int, default=1, help="loop turns (re-prompts, help, clarifications) per path")
+    p.add_argument("--random", type=int, default=2000, help="seeded random walks on top of the enumeration")
+    p.add_argument("--repeat", type=int, default=5, help="timed runs of the enumeration")
+    p.add_argument("--json", help="write the results to this file")
+    args = p.parse_args()
+
+    kb = agent.knowledge()
+    kb.warm()
+    checker = Checker(kb)
+    paths, turns = enumerate_paths(kb, checker, args.loops)
+    checker.coverage()
+    group_phrases(checker)
+    walk_turns = random_walks(kb, checker, args.random)
+    compared = checker.agreement()
+
+    times = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        enumerate_paths(kb, None, args.loops)
+        times.append(time.perf_counter() - t0)
+    best = min(times)
+    result = {"paths": paths, "turns": turns, "loops": args.loops, "random_walks": args.random,
+              "random_turns": walk_turns, "tables_compared": compared,
+              "leaves": len(checker.leaves), "reached": len(checker.reached & checker.leaves),
+              "best_s": round(best, 4), "median_s": round(statistics.median(times), 4),
+              "paths_per_s": round(paths / best, 1), "turns_per_s": round(turns / best, 1),
+              "failures": checker.failures}
+
+    print(f"{paths} paths, {turns} turns (loops <= {args.loops}); "
+          f"{args.random} random walks, {walk_turns} turns")
+    print(f"{result['reached']}/{result['leaves']} tree leaves recommended, "
+          f"{compared} answer tables compared across branches")
+    print(f"enumeration: best {best * 1e3:.1f} ms, median {result['median_s'] * 1e3:.1f} ms "
+          f"-> {result['paths_per_s']:.0f} paths/s, {result['turns_per_s']:.0f} turns/s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    if checker.failures:
+        print(f"\n{len(checker.failures)} failed check(s):")
+        for msg in checker.failures:
+            print("  " + msg)
+        sys.exit(1)
+    print("all checks passed")
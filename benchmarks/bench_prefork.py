@@ -0,0 +1,121 @@
+# bench_prefork.py
+# Throughput and memory of the prefork workers (lexus_prefork.py) by worker count.
+#  - Every configuration runs in a fresh interpreter: the master forks N
+#    workers and drives the scripted conversations of load_test.py straight
+#    into the pool (no HTTP), --concurrency sessions in flight
+#  - "shared": the master warms the data and gc.freeze()s it before forking;
+#    "private": each worker loads its own copy on first use, as N separate
+#    processes would
+#  - Memory per worker from /proc/<pid>/smaps_rollup after the run: Rss,
+#    Pss (shared pages split between the processes mapping them) and
+#    Private_Dirty (pages this worker alone has written). With sharing it
+#    holds the worker's sessions and the shared pages that reference
+#    counting has touched, not a copy of the data
+#  - --scale repeats the catalog (as bench_import.py does) so the data, not
+#    the interpreter, dominates memory
+#  - Scaling is bounded by the cores the host has; on one core the extra
+#    workers only add IPC
+#
+#   python benchmarks/bench_prefork.py [--workers 1 2 4 8] [--sessions 3000] [--scale 100]
+
+import argparse, asyncio, json, os, statistics, subprocess, sys, tempfile, time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+def _one(workers, sessions, concurrency, share):
+    """Run one configuration in this process; returns the report dict."""
+    sys.path.insert(0, ROOT)
+    from load_test import SCRIPTS
+    from lexus_prefork import WorkerPool
+
+    pool = WorkerPool(workers).start(prewarm=share)
+    scripts = list(SCRIPTS.items())
+
+    async def user(queue, stats):
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            expected, lines = scripts[i % len(scripts)]
+            sid, payload = await pool.open()
+            for line in lines:
+                sid, payload = await pool.turn(sid, line)
+                stats["turns"] += 1
+            res = json.loads(payload)
+            stats["ok" if res.get("model") == expected else "mismatch"] += 1
+
+    async def main():
+        await pool.connect()
+        # one session per worker first, so a private worker's data load is not timed
+        for link in pool.links:
+            sid, _ = await link.call("open", False)
+            await link.call("turn", sid, "Ann")
+            await link.call("drop", sid)
+        queue = asyncio.Queue()
+        for i in range(sessions):
+            queue.put_nowait(i)
+        stats = {"turns": 0, "ok": 0, "mismatch": 0}
+        t0 = time.perf_counter()
+        await asyncio.gather(*(user(queue, stats) for _ in range(min(concurrency, sessions))))
+        elapsed = time.perf_counter() - t0
+        mem = list((await pool.memory()).values())
+        await pool.close()
+        return {"workers": workers, "mode": "shared" if share else "private",
+                "turns_per_s": round(stats["turns"] / elapsed, 1), "elapsed_s": round(elapsed, 3),
+                **stats,
+                **{f"{k}_kb": statistics.median(m.get(k, 0) for m in mem)
+                   for k in ("Rss", "Pss", "Private_Dirty")}}
+
+    return asyncio.run(main())
+
+def run(workers, sessions, concurrency, share, env):
+    cmd = [sys.executable, os.path.abspath(__file__), "--one", str(workers), "--sessions", str(sessions),
+           "--concurrency", str(concurrency)] + ([] if share else ["--private"])
+    out = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.splitlines()[-1])
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Prefork throughput and per-worker memory by worker count")
+    cores = os.cpu_count() or 1
+    p.add_argument("--workers", type=int, nargs="+",
+                   default=sorted({1, 2, 4, cores}) if cores > 1 else [1, 2, 4])
+    p.add_argument("--sessions", type=int, default=3000)
+    p.add_argument("--concurrency", type=int, default=200)
+    p.add_argument("--scale", type=int, default=100, help="catalog multiplier (1 = the real catalog)")
+    p.add_argument("--json", help="also write the results to this file")
+    p.add_argument("--one", type=int, help=argparse.SUPPRESS)
+    p.add_argument("--private", action="store_true", help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.one:
+        print(json.dumps(_one(args.one, args.sessions, args.concurrency, not args.private)))
+        sys.exit(0)
+
+    sys.path.insert(0, HERE)
+    from bench_import import scaled_data
+
+    env = dict(os.environ)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.scale > 1:
+            scaled_data(args.scale, tmp)
+            env["LEXUS_DATA_DIR"] = tmp
+        for n in args.workers:
+            for share in (True, False):
+                rows.append(run(n, args.sessions, args.concurrency, share, env))
+
+    base = {r["mode"]: r["turns_per_s"] for r in rows if r["workers"] == args.workers[0]}
+    print(f"{cores} core(s), catalog x{args.scale}, {args.sessions} sessions, {args.concurrency} in flight\n")
+    print(f"{'workers':>7} {'mode':>8} {'turns/s':>9} {'speedup':>8} {'RSS/worker':>11} "
+          f"{'PSS/worker':>11} {'private':>9} {'mismatch':>9}")
+    for r in rows:
+        print(f"{r['workers']:>7} {r['mode']:>8} {r['turns_per_s']:>9.0f} "
+              f"{r['turns_per_s'] / base[r['mode']]:>7.2f}x {r['Rss_kb'] / 1024:>9.1f}MB "
+              f"{r['Pss_kb'] / 1024:>9.1f}MB {r['Private_Dirty_kb'] / 1024:>7.1f}MB {r['mismatch']:>9}")
+    if cores < max(args.workers):
+        print(f"\nonly {cores} core(s): speedup beyond that is not expected here")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cores": cores, "scale": args.scale, "results": rows}, f, indent=2)
@@ -0,0 +1,150 @@
+# run.py
+# Deterministic benchmark suite for the dialog hot paths.
+#  - Seeded RNG and scripted inputs, so every run does the same work
+#  - Parsers are timed with the parse cache off (cold cost) and on
+#  - End-to-end conversations for every leaf model
+#  - Writes machine-readable results and flags regressions against a baseline
+#
+#   python benchmarks/run.py                      # run, compare with baseline.json if present
+#   python benchmarks/run.py --save-baseline      # store this run as the baseline
+#   python benchmarks/run.py --json out.json --threshold 0.15 --quick
+
+import argparse, json, os, platform, random, sys, time, timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import lexus_dialog_agent_v3 as agent
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "baseline.json")
+SEED = 1234
+
+# Representative answers per parser
+BODY_ANSWERS = ["sedan", "I think a crossover suv", "coupe please", "maybe an ev", "something else"]
+YES_NO_ANSWERS = ["yes", "nah", "of course", "I'm good", "hmm not sure"]
+FEEL_ANSWERS = ["luxury", "something sporty", "quiet and plush", "fun", "whatever"]
+NAME_ANSWERS = ["Alex", "my name is Jordan", "I'm Sam!", "hello, this is Mary-Jane", "it's Ava"]
+PEOPLE_ANSWERS = ["2", "like 6 people", "usually two", "three plus me", "4-5", "just me"]
+TYPO_ANSWERS = ["sedn", "i want a crosover", "luxery please", "something sprty", "no idea really"]
+
+# One script per leaf model; utterances in order
+LEAF_SCRIPTS = {
+    "LS": ["my name is Alex", "yes", "yes", "sedan", "luxury", "executive"],
+    "ES": ["I'm Dana", "yes", "no", "2", "sedan", "luxury", "family"],
+    "IS": ["Sam", "yes", "yes", "sedan", "sporty"],
+    "LC": ["this is Lee", "yes", "no", "just two of us", "coupe", "luxury"],
+    "RC": ["Pat", "sure", "yes", "coupe", "fun"],
+    "UX": ["Robin", "yes", "yes", "crossover", "compact", "luxury", "executive"],
+    "NX": ["Chris", "yes", "no", "3", "suv", "compact", "fun"],
+    "RX": ["Morgan", "yes", "no", "5", "crossover", "mid size", "luxury", "family"],
+    "GX": ["Taylor", "yes", "yes", "suv", "mid-size", "fun"],
+    "LX": ["Jordan", "yes", "no", "six", "suv", "full-size", "executive"],
+    "TX": ["Casey", "yes", "yes", "crossover", "full size", "family"],
+    "RZ": ["it's Riley", "yes", "yes", "electric", "yes"],
+}
+
+def run_script(lines):
+    _, s = agent.start()
+    for line in lines:
+        _, s = agent.reply(s, line)
+        if s["stage"] == "done":
+            break
+    return s["model"]
+
+def _time(fn, number, repeat):
+    best = min(timeit.repeat(fn, number=number, repeat=repeat))
+    return best / number * 1e9
+
+def cases():
+    a = agent
+    cat = a.CATALOG
+    crossovers = a.filter_attr(cat.all, "body", "crossover")
+    yield "norm", len(BODY_ANSWERS), lambda: [a.norm(x, a.BODIES) for x in BODY_ANSWERS], True
+    yield "norm_from_subset", len(YES_NO_ANSWERS), \
+        lambda: [a.norm_from_subset(x, a.YES_NO, a.YES_NO_KEYS) for x in YES_NO_ANSWERS], True
+    yield "norm[feel]", len(FEEL_ANSWERS), lambda: [a.norm(x, a.FEEL) for x in FEEL_ANSWERS], True
+    yield "fuzzy_parse", len(TYPO_ANSWERS), \
+        lambda: [a.fuzzy_parse(x, a.BODIES) or a.fuzzy_parse(x, a.FEEL) for x in TYPO_ANSWERS], True
+    yield "_contains_term", len(BODY_ANSWERS), \
+        lambda: [a._contains_term(x, "crossover suv") for x in BODY_ANSWERS], False
+    yield "extract_name", len(NAME_ANSWERS), lambda: [a.extract_name(x) for x in NAME_ANSWERS], False
+    yield "detect_family_bucket", len(PEOPLE_ANSWERS), \
+        lambda: [a.detect_family_bucket(x) for x in PEOPLE_ANSWERS], True
+    yield "filter_attr", 3, lambda: (a.filter_attr(cat.all, "body", "sedan"),
+                                     a.filter_attr(crossovers, "persona", "family"),
+                                     a.filter_attr(crossovers, "feel", "fun")), False
+    yield "need_attr", 3, lambda: (a.need_attr(cat.all, "body"), a.need_attr(crossovers, "persona"),
+                                   a.need_attr(crossovers, "powertrain")), False
+    for model, lines in LEAF_SCRIPTS.items():
+        yield f"e2e[{model}]", 1, (lambda lines=lines: run_script(lines)), True
+
+def run(quick=False):
+    number, repeat = (200, 3) if quick else (2000, 5)
+    results = {}
+    cache = agent.PARSE_CACHE
+    size = cache.maxsize
+    for name, ops, fn, cached_variant in cases():
+        variants = [(name, 0)] + ([(name + "[cached]", size)] if cached_variant else [])
+        for label, cache_size in variants:
+            cache.clear()
+            cache.resize(cache_size)
+            random.seed(SEED)
+            fn()  # warm-up: compiles matchers, fills the cache when enabled
+            random.seed(SEED)
+            results[label] = {"ns_per_op": round(_time(fn, number, repeat) / ops, 1)}
+    cache.resize(size)
+    return results
+
+def check_scripts():
+    random.seed(SEED)
+    wrong = {m: got for m, lines in LEAF_SCRIPTS.items() if (got := run_script(lines)) != m}
+    if wrong:
+        raise SystemExit(f"leaf scripts reach the wrong model: {wrong}")
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base and r["ns_per_op"] > base["ns_per_op"] * (1 + threshold):
+            regressions.append((name, base["ns_per_op"], r["ns_per_op"]))
+    return regressions
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Benchmark the dialog hot paths")
+    p.add_argument("--json", help="write results to this file")
+    p.add_argument("--baseline", default=BASELINE)
+    p.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    p.add_argument("--threshold", type=float, default=0.20, help="allowed slowdown before flagging (0.20 = 20%%)")
+    p.add_argument("--quick", action="store_true", help="fewer iterations, for smoke runs")
+    args = p.parse_args()
+
+    check_scripts()
+    doc = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(),
+                 "seed": SEED, "quick": args.quick, "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": run(args.quick),
+    }
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(doc["results"], baseline, args.threshold) if baseline else []
+    doc["regressions"] = [{"name": n, "baseline_ns": b, "ns": c} for n, b, c in regressions]
+
+    for name, r in doc["results"].items():
+        base = (baseline or {}).get("results", {}).get(name)
+        delta = f"  ({(r['ns_per_op'] / base['ns_per_op'] - 1) * 100:+.0f}%)" if base else ""
+        print(f"{name:<28} {r['ns_per_op'] / 1000:>10.2f} us/op{delta}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(doc, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(doc, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+    elif baseline is None:
+        print("no baseline yet; run with --save-baseline to store one")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for n, b, c in regressions:
+            print(f"  {n}: {b / 1000:.2f} -> {c / 1000:.2f} us/op")
+        sys.exit(1)
@@ -0,0 +1,349 @@
+# chat_server.py
+# asyncio HTTP + WebSocket front end for the Lexus dialog engine.
+#  - One event loop multiplexes every showroom conversation
+#  - Per-session dialog state and recent history live in a session store
+#    (lexus_store.py): in memory by default, or a shared SQLite file with
+#    --store sqlite:sessions.db so several workers can serve one conversation;
+#    idle sessions expire after --idle-timeout
+#  - Edited data files (data/*.json) are picked up on the sweep, without a
+#    restart and without dropping conversations
+#  - --workers N forks N dialog workers that share the loaded data
+#    copy-on-write, sessions routed by id (lexus_prefork.py)
+#  - Standard library only: run with `python chat_server.py --port 8765`
+#
+# HTTP:  POST /chat  {"session": "<id or omitted>", "text": "..."}
+#        -> {"session": id, "reply": text, "done": bool, "model": str|null,
+#            "ranked": [{"name", "score", "matched", "missed"}, ...] once done}
+#        A missing or unknown session id opens a new conversation and returns
+#        the greeting; {"locale": "es"} on that first request also reads the
+#        customer's answers in Spanish (any pack in data/locales).
+#        GET /health returns {"ok": true, "sessions": n, "data": version,
+#        "parse_cache": {hits, misses, evictions, ...}}.
+#        With --metrics, GET /metrics serves Prometheus text and
+#        GET /metrics.json the same data as JSON. Opening a session with
+#        {"profile": true} collects a cProfile for it, readable at
+#        GET /profile?session=<id>.
+#        With --events PATH, dialog events are appended to PATH (see
+#        lexus_analytics.py) and GET /analytics returns the funnel summary
+#        since startup.
+# WS:    GET /ws opens one conversation per socket (GET /ws?locale=fr for a
+#        locale pack); every text frame is a user utterance and every reply
+#        comes back as the same JSON object.
+# Errors: a session whose dialog worker fails gets {"session": id, "error": ...},
+#        as a 500 over HTTP, or as a frame followed by a 1011 close over WS.
+
+import argparse, asyncio, base64, hashlib, json, secrets, sys
+from urllib.parse import parse_qs, urlsplit
+
+import lexus_dialog_agent_v3 as agent
+from lexus_dialog_agent_v3 import PARSE_CACHE, start, reply
+from lexus_analytics import EVENTS, Aggregator, EventLog
+from lexus_metrics import METRICS
+from lexus_prompts import json_bytes
+from lexus_store import open_store
+
+MAX_BODY = 64 * 1024
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# ------------ Sessions ------------
+class SessionTable:
+    """Dialog sessions kept in a session store, with idle-timeout expiry."""
+
+    def __init__(self, idle_timeout=900.0, store=None, new_sid=None):
+        self.idle_timeout = idle_timeout
+        self.store = store if store is not None else open_store(ttl=idle_timeout)
+        self.new_sid = new_sid or (lambda: secrets.token_hex(8))
+
+    def __len__(self):
+        return len(self.store)
+
+    def open(self, profile=False, locale=None):
+        sid = self.new_sid()
+        text, session = start(locale=locale)
+        if profile:
+            session["profile"] = sid
+        self.store.save(sid, session, [(None, text)])
+        return sid, text, session
+
+    def turn(self, sid, text):
+        session, history = self.store.load(sid)
+        if session is None:
+            return self.open()
+        out, session = reply(session, text)
+        history.append((text, out))
+        self.store.save(sid, session, history)
+        return sid, out, session
+
+    def drop(self, sid):
+        self.store.drop(sid)
+
+    def evict_idle(self):
+        return self.store.expire()
+
+def _payload(sid, text, session):
+    # JSON bytes; the reply is mostly a pre-rendered prompt whose encoding
+    # is cached (lexus_prompts.json_bytes)
+    done = session["stage"] == "done"
+    model = session.get("model") if done else None
+    out = b'{"session": %s, "reply": %s, "done": %s, "model": %s' % (
+        json.dumps(sid).encode(), json_bytes(text), b"true" if done else b"false", json.dumps(model).encode())
+    if model:
+        out += b', "ranked": ' + json.dumps([r._asdict() for r in agent.rank(session["slots"])]).encode()
+    return out + b"}"
+
+# ------------ HTTP ------------
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    method, path, _ = line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        k, _, v = h.decode("latin-1").partition(":")
+        headers[k.strip().lower()] = v.strip()
+    n = int(headers.get("content-length") or 0)
+    if n > MAX_BODY:
+        raise ValueError("request body too large")
+    body = await reader.readexactly(n) if n else b""
+    return method, path, headers, body
+
+def _response(status, obj, keep_alive=True):
+    if isinstance(obj, str):
+        body, ctype = obj.encode(), "text/plain; version=0.0.4"
+    elif isinstance(obj, bytes):
+        body, ctype = obj, "application/json"  # already encoded
+    else:
+        body, ctype = json.dumps(obj).encode(), "application/json"
+    head = (f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + body
+
+# ------------ WebSocket (RFC 6455, text frames only) ------------
+def _ws_frame(data, opcode=0x1):
+    n = len(data)
+    if n < 126:
+        head = bytes([0x80 | opcode, n])
+    elif n < 65536:
+        head = bytes([0x80 | opcode, 126]) + n.to_bytes(2, "big")
+    else:
+        head = bytes([0x80 | opcode, 127]) + n.to_bytes(8, "big")
+    return head + data
+
+async def _ws_read(reader):
+    """Return (opcode, payload) of the next complete message."""
+    chunks, first_op = [], None
+    while True:
+        b0, b1 = await reader.readexactly(2)
+        op, n = b0 & 0x0F, b1 & 0x7F
+        if n == 126:
+            n = int.from_bytes(await reader.readexactly(2), "big")
+        elif n == 127:
+            n = int.from_bytes(await reader.readexactly(8), "big")
+        if n > MAX_BODY:
+            raise ValueError("frame too large")
+        mask = await reader.readexactly(4) if b1 & 0x80 else None
+        data = await reader.readexactly(n)
+        if mask and n:
+            key = (mask * (n // 4 + 1))[:n]
+            data = (int.from_bytes(data, "big") ^ int.from_bytes(key, "big")).to_bytes(n, "big")
+        if op >= 0x8:  # control frames may arrive between fragments
+            return op, data
+        if first_op is None:
+            first_op = op
+        chunks.append(data)
+        if b0 & 0x80:
+            return first_op, b"".join(chunks)
+
+async def _serve_ws(server, reader, writer, headers, locale=None):
+    accept = base64.b64encode(hashlib.sha1(headers["sec-websocket-key"].encode() + WS_GUID).digest())
+    writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                 b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+    sid = None
+    try:
+        sid, payload = await server.open(locale=locale)
+        writer.write(_ws_frame(payload))
+        await writer.drain()
+        while True:
+            op, data = await _ws_read(reader)
+            if op == 0x8:
+                writer.write(_ws_frame(data[:2], 0x8))
+                break
+            if op == 0x9:
+                writer.write(_ws_frame(data, 0xA))
+            elif op == 0x1:
+                sid, payload = await server.turn(sid, data.decode("utf-8", "replace"))
+                writer.write(_ws_frame(payload))
+            await writer.drain()
+    except WorkerError as e:
+        # an error frame, then a close with 1011 (internal error)
+        writer.write(_ws_frame(json.dumps(_failed(sid, e)).encode()) + _ws_frame((1011).to_bytes(2, "big"), 0x8))
+        await writer.drain()
+        sid = None  # its worker is gone or broken; nothing to drop
+    finally:
+        if sid is not None:
+            await server.drop(sid)
+
+# ------------ Server ------------
+class WorkerError(RuntimeError):
+    """A session operation failed in a dialog worker (lexus_prefork.py)."""
+
+def _failed(sid, e):
+    # log the broken session; the client gets an error instead of a dropped socket
+    print(f"session {sid}: {e}", file=sys.stderr)
+    return {"session": sid, "error": "internal error"}
+
+class ChatServer:
+    def __init__(self, idle_timeout=900.0, sweep_every=30.0, reload_data=True, store=None):
+        self.table = SessionTable(idle_timeout, store)
+        self.sweep_every = sweep_every
+        self.reload_data = reload_data
+        self.analytics = None  # live Aggregator when events are on
+        self._server = None
+        self._sweeper = None
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                req = await _read_request(reader)
+                if req is None:
+                    break
+                method, path, headers, body = req
+                url = urlsplit(path)
+                if url.path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                    locale = parse_qs(url.query).get("locale", [None])[0]
+                    if locale and locale not in agent.locales():
+                        writer.write(_response("400 Bad Request", {"error": f"no locale {locale!r}"}, False))
+                        await writer.drain()
+                        break
+                    await _serve_ws(self, reader, writer, headers, locale)
+                    break
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(await self.route(method, path, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    # Session operations return (sid, payload bytes) and are awaitable, so a
+    # worker pool can stand in for the in-process table (lexus_prefork.py)
+    async def open(self, profile=False, locale=None):
+        sid, text, session = self.table.open(profile, locale)
+        return sid, _payload(sid, text, session)
+
+    async def turn(self, sid, text):
+        sid, text, session = self.table.turn(sid, text)
+        return sid, _payload(sid, text, session)
+
+    async def drop(self, sid):
+        self.table.drop(sid)
+
+    async def sessions(self):
+        return len(self.table)
+
+    async def sweep_once(self):
+        self.table.evict_idle()
+        if self.reload_data:
+            agent.reload_data()
+
+    async def route(self, method, target, body, keep_alive=True):
+        url = urlsplit(target)
+        path = url.path
+        if method == "GET" and path == "/metrics":
+            return _response("200 OK", METRICS.prometheus_text(), keep_alive)
+        if method == "GET" and path == "/metrics.json":
+            return _response("200 OK", METRICS.to_dict(), keep_alive)
+        if method == "GET" and path == "/profile":
+            sid = parse_qs(url.query).get("session", [""])[0]
+            return _response("200 OK", METRICS.profile_stats(sid) or "no profile for this session\n", keep_alive)
+        if method == "GET" and path == "/analytics":
+            if self.analytics is None:
+                return _response("404 Not Found", {"error": "start the server with --events"}, keep_alive)
+            return _response("200 OK", self.analytics.summary(), keep_alive)
+        if method == "GET" and path == "/health":
+            return _response("200 OK", {"ok": True, "sessions": await self.sessions(), "data": agent.KB.version,
+                                        "parse_cache": PARSE_CACHE.stats()}, keep_alive)
+        if method == "POST" and path == "/chat":
+            try:
+                msg = json.loads(body or b"{}")
+                text = str(msg.get("text", ""))
+            except (ValueError, AttributeError):
+                return _response("400 Bad Request", {"error": "expected a JSON object"}, keep_alive)
+            sid = msg.get("session")
+            locale = msg.get("locale")
+            if locale and locale not in agent.locales():
+                return _response("400 Bad Request", {"error": f"no locale {locale!r}"}, keep_alive)
+            try:
+                if sid:
+                    _, payload = await self.turn(sid, text)
+                else:
+                    _, payload = await self.open(bool(msg.get("profile")), locale)
+            except WorkerError as e:
+                return _response("500 Internal Server Error", _failed(sid, e), keep_alive)
+            return _response("200 OK", payload, keep_alive)
+        return _response("404 Not Found", {"error": "not found"}, keep_alive)
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self.sweep_every)
+            await self.sweep_once()
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self._server = await asyncio.start_server(self.handle, host, port)
+        self._sweeper = asyncio.create_task(self._sweep())
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        self._sweeper.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+
+async def _main(args, pool=None):
+    if pool is not None:
+        from lexus_prefork import PreforkServer
+        server = PreforkServer(pool, args.sweep, not args.no_reload)
+    else:
+        server = ChatServer(args.idle_timeout, args.sweep, not args.no_reload,
+                            open_store(args.store, args.idle_timeout))
+    if args.events and pool is None:
+        EVENTS.attach(EventLog(args.events))
+        server.analytics = EVENTS.attach(Aggregator())
+    host, port = await server.start(args.host, args.port)
+    workers = f", {pool.size} workers" if pool is not None else ""
+    print(f"Lexus chat server on http://{host}:{port} (POST /chat, WS /ws{workers})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="asyncio HTTP/WebSocket front end for the Lexus dialog")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--idle-timeout", type=float, default=900.0, help="seconds before an idle session is evicted")
+    p.add_argument("--sweep", type=float, default=30.0, help="seconds between eviction sweeps and data reload checks")
+    p.add_argument("--store", default=None,
+                   help='session store: "memory" or "sqlite:<path>" (default $LEXUS_SESSION_STORE or memory)')
+    p.add_argument("--no-reload", action="store_true", help="do not pick up edited data files")
+    p.add_argument("--metrics", action="store_true", help="collect timers/counters for /metrics")
+    p.add_argument("--events", help="append dialog events to this JSON-lines file and serve /analytics")
+    p.add_argument("--workers", type=int, default=0,
+                   help="fork this many dialog workers sharing the loaded data (lexus_prefork.py)")
+    args = p.parse_args()
+    if args.metrics:
+        METRICS.enable()
+    pool = None
+    if args.workers > 0:
+        # fork before the event loop exists
+        from lexus_prefork import WorkerPool
+        pool = WorkerPool(args.workers, args.idle_timeout, args.store, args.events).start()
+    try:
+        asyncio.run(_main(args, pool))
+    except KeyboardInterrupt:
+        pass
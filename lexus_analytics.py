@@ -0,0 +1,350 @@
+# lexus_analytics.py
+# Conversation analytics: dialog events in, compact funnel summaries out.
+#  - The engine reports turns, re-prompts, clarifying questions, endings and
+#    recommendations to EVENTS; with no sink attached that costs one
+#    attribute check, like METRICS
+#  - EventLog: a sink appending events to a JSON-lines file
+#  - Aggregator: consumes events one at a time in constant memory (counters
+#    per stage, P² quantile estimates of turn latency) and hands out a
+#    compact summary every N events or T seconds of traffic
+#  - merge() folds stored summaries together, so months of traffic are read
+#    back from summaries instead of raw logs
+#
+#   python lexus_analytics.py events.jsonl [...] [--window 3600 --summaries out.jsonl]
+#   python lexus_analytics.py --from-summaries out.jsonl [...]
+#
+# Event: {"ts": unix time, "kind": str, "stage": stage label, ...}
+#   turn       next (stage label after the turn), ms
+#   reprompt   streak (turns in a row the question had to be asked again)
+#   clarify    streak
+#   recommend  model
+#   end        reason ("exit" or "declined")
+#   fallback   to (RZ declined -> crossover_suv)
+# A session starts with a turn from "start" (no session) or "done".
+
+import sys, threading, time
+
+class Events:
+    """Fan-out of dialog events to the attached sinks (callables taking a dict)."""
+
+    def __init__(self):
+        self.enabled = False
+        self.sinks = []
+
+    def attach(self, sink):
+        self.sinks.append(sink)
+        self.enabled = True
+        return sink
+
+    def detach(self, sink):
+        self.sinks.remove(sink)
+        self.enabled = bool(self.sinks)
+
+    def emit(self, kind, stage, **fields):
+        event = {"ts": round(time.time(), 3), "kind": kind, "stage": stage, **fields}
+        for sink in self.sinks:
+            sink(event)
+
+EVENTS = Events()
+
+class EventLog:
+    """Sink appending one JSON line per event; safe to share between threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._f = open(path, "a", buffering=1, encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        import json  # not at import time: the engine loads this module
+        line = json.dumps(event, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._f.write(line)
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+def read_events(path):
+    """Events from a JSON-lines file, one at a time; unreadable lines are skipped."""
+    import json
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+# ------------ Streaming quantiles ------------
+class P2Quantile:
+    """P² estimate of one quantile (Jain & Chlamtac): five markers, O(1) per value."""
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.q = []                      # marker heights
+        self.n = [0, 1, 2, 3, 4]         # marker positions
+        self.want = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self.step = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        self.count += 1
+        q = self.q
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        n = self.n
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.want[i] += self.step[i]
+        for i in (1, 2, 3):
+            d = self.want[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                h = self._parabolic(i, d)
+                if not q[i - 1] < h < q[i + 1]:
+                    h = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = h
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.q, self.n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        if not self.q:
+            return None
+        if self.count <= 5:
+            return self.q[min(len(self.q) - 1, int(self.p * len(self.q)))]
+        return self.q[2]
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+class _Latency:
+    def __init__(self):
+        self.est = [P2Quantile(p) for p in QUANTILES]
+
+    def add(self, ms):
+        for e in self.est:
+            e.add(ms)
+
+    def summary(self):
+        return {f"p{round(e.p * 100)}": round(e.value(), 3) for e in self.est if e.count}
+
+# ------------ Aggregation ------------
+_STAGE_COUNTERS = ("turns", "entered", "advanced", "ended", "reprompts", "clarifications", "loops", "max_streak")
+_SESSION_START = ("start", "done")
+LOOP = 2  # a question asked this many times in a row counts as a re-prompt loop
+
+class Aggregator:
+    """Funnel counters and latency quantiles over a stream of events.
+
+    Memory depends on the number of stages and models, not on the traffic.
+    With `every` (events) or `interval` (seconds of event time) set, each
+    full window is passed to `emit` as a summary and the counts start over;
+    summary() covers the current window either way."""
+
+    def __init__(self, every=None, interval=None, emit=None):
+        self.every = every
+        self.interval = interval
+        self.emit = emit
+        self.reset()
+
+    def reset(self):
+        self.events = 0
+        self.first = self.last = None
+        self.sessions = 0
+        self.stages = {}          # stage label -> {counter: n}
+        self.latency = {}         # stage label -> _Latency
+        self.all_latency = _Latency()
+        self.recommendations = {}
+        self.ends = {}
+        self.fallbacks = 0
+
+    def __call__(self, event):
+        self.add(event)
+
+    def _stage(self, label):
+        st = self.stages.get(label)
+        if st is None:
+            st = self.stages[label] = dict.fromkeys(_STAGE_COUNTERS, 0)
+        return st
+
+    def add(self, event):
+        ts = event.get("ts", 0.0)
+        if self.interval and self.first is not None and ts - self.first >= self.interval:
+            self.flush()
+        if self.first is None:
+            self.first = ts
+        self.last = ts
+        self.events += 1
+        kind, stage = event.get("kind"), event.get("stage")
+        if kind == "turn":
+            nxt = event.get("next")
+            if stage in _SESSION_START:
+                self.sessions += 1
+            else:
+                st = self._stage(stage)
+                st["turns"] += 1
+                if nxt != stage:
+                    st["advanced"] += 1
+            if nxt != stage and nxt is not None:
+                self._stage(nxt)["entered"] += 1
+            ms = event.get("ms")
+            if ms is not None and stage not in _SESSION_START:
+                lat = self.latency.get(stage)
+                if lat is None:
+                    lat = self.latency[stage] = _Latency()
+                lat.add(ms)
+                self.all_latency.add(ms)
+        elif kind in ("reprompt", "clarify"):
+            st = self._stage(stage)
+            st["reprompts" if kind == "reprompt" else "clarifications"] += 1
+            streak = event.get("streak", 1)
+            if streak == LOOP:
+                st["loops"] += 1
+            if streak > st["max_streak"]:
+                st["max_streak"] = streak
+        elif kind == "recommend":
+            model = event.get("model")
+            self.recommendations[model] = self.recommendations.get(model, 0) + 1
+        elif kind == "end":
+            reason = event.get("reason")
+            self.ends[reason] = self.ends.get(reason, 0) + 1
+            self._stage(stage)["ended"] += 1  # left the stage, but not forward
+        elif kind == "fallback":
+            self.fallbacks += 1
+        if self.every and self.events >= self.every:
+            self.flush()
+
+    def flush(self):
+        """Emit the current window (if any events) and start a new one."""
+        if self.events and self.emit is not None:
+            self.emit(self.summary())
+        self.reset()
+
+    def summary(self):
+        stages = {}
+        for label, st in self.stages.items():
+            out = {k: v for k, v in st.items() if v}
+            lat = self.latency.get(label)
+            if lat is not None:
+                out["ms"] = lat.summary()
+            stages[label] = out
+        return {"from": self.first, "to": self.last, "events": self.events, "sessions": self.sessions,
+                "stages": stages, "ms": self.all_latency.summary(),
+                "recommendations": dict(self.recommendations), "ends": dict(self.ends),
+                "fallbacks": self.fallbacks}
+
+def _weighted(parts):
+    # quantiles of merged windows: turn-weighted mean of the window estimates
+    total = sum(w for w, _ in parts)
+    if not total:
+        return {}
+    keys = {k for _, q in parts for k in q}
+    return {k: round(sum(w * q[k] for w, q in parts if k in q) / sum(w for w, q in parts if k in q), 3)
+            for k in sorted(keys)}
+
+def merge(summaries):
+    """One summary covering all of `summaries`. Counts are exact; quantiles
+    are turn-weighted averages of the window estimates."""
+    out = {"from": None, "to": None, "events": 0, "sessions": 0, "stages": {}, "ms": {},
+           "recommendations": {}, "ends": {}, "fallbacks": 0}
+    stage_ms, all_ms = {}, []
+    for s in summaries:
+        if s.get("from") is not None:
+            out["from"] = s["from"] if out["from"] is None else min(out["from"], s["from"])
+            out["to"] = s["to"] if out["to"] is None else max(out["to"], s["to"])
+        for k in ("events", "sessions", "fallbacks"):
+            out[k] += s.get(k, 0)
+        for k in ("recommendations", "ends"):
+            for name, n in s.get(k, {}).items():
+                out[k][name] = out[k].get(name, 0) + n
+        turns = 0
+        for label, st in s.get("stages", {}).items():
+            dst = out["stages"].setdefault(label, {})
+            for k, v in st.items():
+                if k == "ms":
+                    stage_ms.setdefault(label, []).append((st.get("turns", 0), v))
+                elif k == "max_streak":
+                    dst[k] = max(dst.get(k, 0), v)
+                else:
+                    dst[k] = dst.get(k, 0) + v
+            turns += st.get("turns", 0)
+        if s.get("ms"):
+            all_ms.append((turns, s["ms"]))
+    for label, parts in stage_ms.items():
+        out["stages"][label]["ms"] = _weighted(parts)
+    out["ms"] = _weighted(all_ms)
+    return out
+
+def report(summary):
+    """Plain-text funnel table for a summary."""
+    lines = [f"{summary['sessions']} sessions, {summary['events']} events"]
+    stages = {label: st for label, st in summary["stages"].items() if label != "done"}
+    lines.append(f"{'stage':<16}{'entered':>9}{'advanced':>10}{'ended':>7}{'conv':>7}{'reprompt':>10}"
+                 f"{'loops':>7}{'clarify':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for label in sorted(stages, key=lambda l: -stages[l].get("entered", 0)):
+        st = stages[label]
+        entered, ended = st.get("entered", 0), st.get("ended", 0)
+        advanced = st.get("advanced", 0) - ended
+        conv = f"{advanced / entered:.0%}" if entered else "-"
+        ms = st.get("ms", {})
+        lines.append(f"{label:<16}{entered:>9}{advanced:>10}{ended:>7}{conv:>7}{st.get('reprompts', 0):>10}"
+                     f"{st.get('loops', 0):>7}{st.get('clarifications', 0):>9}"
+                     f"{ms.get('p50', 0):>9.3f}{ms.get('p99', 0):>9.3f}")
+    recs = summary["recommendations"]
+    total = sum(recs.values()) or 1
+    lines.append("recommendations: " + ", ".join(
+        f"{m} {n} ({n / total:.0%})" for m, n in sorted(recs.items(), key=lambda kv: -kv[1])))
+    ends = summary["ends"]
+    lines.append(f"ended early: {ends.get('declined', 0)} declined Lexus, {ends.get('exit', 0)} quit; "
+                 f"RZ declined -> crossover_suv: {summary['fallbacks']}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    import argparse, json
+
+    p = argparse.ArgumentParser(description="Summarize dialog event logs")
+    p.add_argument("inputs", nargs="+", help="event logs (JSON lines), or summaries with --from-summaries")
+    p.add_argument("--from-summaries", action="store_true", help="inputs are summaries written by --summaries")
+    p.add_argument("--window", type=float, help="seconds of traffic per written summary")
+    p.add_argument("--summaries", help="append one summary per window to this file")
+    p.add_argument("--json", action="store_true", help="print the overall summary as JSON")
+    args = p.parse_args()
+
+    if args.from_summaries:
+        total = merge(s for path in args.inputs for s in read_events(path))
+    else:
+        agg = Aggregator()
+        out = open(args.summaries, "a", encoding="utf-8") if args.summaries else None
+        window = Aggregator(interval=args.window or 3600,
+                            emit=lambda s: out.write(json.dumps(s, separators=(",", ":")) + "\n")) if out else None
+        for path in args.inputs:
+            for event in read_events(path):
+                agg.add(event)
+                if window is not None:
+                    window.add(event)
+        if window is not None:
+            window.flush()
+            out.close()
+        total = agg.summary()
+    if args.json:
+        json.dump(total, sys.stdout, indent=2)
+        print()
+    else:
+        print(report(total))
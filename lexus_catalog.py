@@ -0,0 +1,61 @@
+# lexus_catalog.py
+# Indexed model catalog.
+#  - Records are stored column-wise (one list per attribute)
+#  - Every attribute has an inverted index: value -> bitmap of record ids
+#  - A candidate set is a plain int bitmap, so narrowing is a single `&`
+#  - Distinct remaining values depend only on the attribute's vocabulary size,
+#    not on how many trims/years/variants the catalog holds
+
+class Catalog:
+    def __init__(self, models):
+        self.size = len(models)
+        self.attrs = []
+        for m in models:
+            for k in m:
+                if k not in self.attrs:
+                    self.attrs.append(k)
+        self.columns = {a: [m.get(a) for m in models] for a in self.attrs}
+        self.index = {}
+        for a, col in self.columns.items():
+            idx = self.index[a] = {}
+            for i, v in enumerate(col):
+                idx[v] = idx.get(v, 0) | (1 << i)
+        self.all = (1 << self.size) - 1
+
+    def narrow(self, cands, attr, value):
+        """Candidates from `cands` whose `attr` equals `value`."""
+        return cands & self.index.get(attr, {}).get(value, 0)
+
+    def narrow_any(self, cands, attr, values):
+        """Candidates from `cands` whose `attr` is any of `values`."""
+        idx = self.index.get(attr, {})
+        bits = 0
+        for v in values:
+            bits |= idx.get(v, 0)
+        return cands & bits
+
+    def values(self, cands, attr):
+        """Distinct values of `attr` among `cands`, in catalog order."""
+        return [v for v, bits in self.index.get(attr, {}).items() if bits & cands]
+
+    def count_values(self, cands, attr):
+        n = 0
+        for bits in self.index.get(attr, {}).values():
+            if bits & cands:
+                n += 1
+        return n
+
+    def ids(self, cands):
+        while cands:
+            low = cands & -cands
+            yield low.bit_length() - 1
+            cands ^= low
+
+    def record(self, i):
+        return {a: col[i] for a, col in self.columns.items() if col[i] is not None}
+
+    def records(self, cands):
+        return [self.record(i) for i in self.ids(cands)]
+
+    def __len__(self):
+        return self.size
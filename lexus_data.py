@@ -0,0 +1,143 @@
+# lexus_data.py
+# External data for the dialog: the line-up and the answer vocabularies.
+#  - data/catalog.json: models, one-line blurbs, price ranges
+#  - data/vocab.json:   yes/no words and the synonym maps per question
+#  - Both are compiled into one binary snapshot (data/lexus.snap, marshal
+#    format) that processes read through mmap, so workers share one
+#    page-cache copy of the file instead of each parsing JSON
+#  - The snapshot records a hash of the sources; a missing or stale one is
+#    rebuilt on load
+#  - DataWatcher polls the sources and hands out new data when they change
+#  - data/locales/<code>.json: a vocabulary pack per language, read only
+#    when a session in that language first needs it (lexus_locale.py)
+#  - LEXUS_DATA_DIR points at another data directory
+#
+# Rebuild by hand (optional, load() does it when needed):
+#   python lexus_data.py
+
+import hashlib, json, marshal, mmap, os
+
+DATA_DIR = os.environ.get("LEXUS_DATA_DIR") or \
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SOURCES = ("catalog.json", "vocab.json")
+SNAPSHOT = "lexus.snap"
+LOCALE_DIR = "locales"
+MAGIC = b"LEXSNAP1"
+
+def _stat(data_dir):
+    # cheap change check: size and mtime of every source
+    out = []
+    for name in SOURCES:
+        st = os.stat(os.path.join(data_dir, name))
+        out.append((name, st.st_size, st.st_mtime_ns))
+    return tuple(out)
+
+def _read(data_dir):
+    raw = {}
+    for name in SOURCES:
+        with open(os.path.join(data_dir, name), "rb") as f:
+            raw[name] = f.read()
+    return raw, hashlib.sha1(b"\0".join(raw[n] for n in SOURCES)).hexdigest()[:16]
+
+def _vocab_sets(vocab):
+    # synonym lists become sets, the shape the parsers expect
+    return {k: (set(v) if isinstance(v, list) else {kk: set(vv) for kk, vv in v.items()})
+            for k, v in vocab.items()}
+
+def _compile(raw, version):
+    catalog = json.loads(raw["catalog.json"])
+    out = _vocab_sets(json.loads(raw["vocab.json"]))
+    return {"version": version, "models": catalog["models"], "explains": catalog["explains"],
+            "price_ranges": catalog["price_ranges"], "vocab": out}
+
+def save_snapshot(data, path):
+    # a private temp file per writer: prefork workers reloading at once
+    # each replace the snapshot whole instead of writing into one .tmp
+    import tempfile  # only rebuilds write; kept off the import path
+    fd, tmp = tempfile.mkstemp(prefix=SNAPSHOT + ".", suffix=".tmp", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + marshal.dumps(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+def load_snapshot(path):
+    """Return the data stored in the snapshot at `path`, or None if unreadable."""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(MAGIC)] != MAGIC:
+                return None
+            with memoryview(mm) as view:
+                return marshal.loads(view[len(MAGIC):])
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+
+def load(data_dir=DATA_DIR):
+    """Current data: the snapshot if it matches the sources, else freshly compiled.
+
+    A rebuilt snapshot is written back when the directory is writable."""
+    raw, version = _read(data_dir)
+    path = os.path.join(data_dir, SNAPSHOT)
+    data = load_snapshot(path)
+    if data is not None and data.get("version") == version:
+        return data
+    data = _compile(raw, version)
+    try:
+        save_snapshot(data, path)
+    except OSError:
+        pass
+    return data
+
+def locales(data_dir=DATA_DIR):
+    """Codes of the locale packs in `data_dir`, sorted."""
+    try:
+        names = os.listdir(os.path.join(data_dir, LOCALE_DIR))
+    except OSError:
+        return []
+    return sorted(n[:-5] for n in names if n.endswith(".json"))
+
+def load_locale(code, data_dir=DATA_DIR):
+    """The locale pack `code`, with its vocabulary as sets."""
+    if not code.isalnum():  # a code, never a path
+        raise ValueError(f"bad locale code {code!r}")
+    with open(os.path.join(data_dir, LOCALE_DIR, code + ".json"), encoding="utf-8") as f:
+        pack = json.load(f)
+    pack["vocab"] = _vocab_sets(pack.get("vocab", {}))
+    return pack
+
+class DataWatcher:
+    """Poll the data files; poll() returns new data after they change, else None."""
+
+    def __init__(self, data_dir=DATA_DIR, version=None):
+        self.data_dir = data_dir
+        self.version = version
+        self._stat = None
+
+    def poll(self):
+        try:
+            st = _stat(self.data_dir)
+        except OSError:
+            return None  # mid-rename or removed; keep serving the current data
+        if st == self._stat:
+            return None
+        try:
+            data = load(self.data_dir)
+        except (OSError, ValueError, KeyError, AttributeError):
+            return None  # half-written or broken edit; try again next poll
+        self._stat = st
+        if data["version"] == self.version:
+            return None
+        self.version = data["version"]
+        return data
+
+if __name__ == "__main__":
+    raw, version = _read(DATA_DIR)
+    save_snapshot(_compile(raw, version), os.path.join(DATA_DIR, SNAPSHOT))
+    print(f"Wrote {os.path.join(DATA_DIR, SNAPSHOT)} (version {version})")
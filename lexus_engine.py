@@ -0,0 +1,738 @@
+# lexus_engine.py
+# The dialog engine: sessions, turn handling and the knowledge they read.
+#  - Knowledge: everything derived from one version of the data files;
+#    indexes and reply tables are built on first use, not up front
+#  - knowledge(): the current Knowledge, loaded on the first turn that needs
+#    it, so importing the engine (or a session that only says "quit")
+#    never reads the catalog
+#  - reply(session, text) -> (bot_text, new_session)
+#  - A session with a "locale" parses its answers through that locale pack
+#    (lexus_locale.py), built the first time a session uses it
+
+import itertools, random, threading, time
+from functools import cached_property
+
+# lexus_data and lexus_tree (json, hashlib, file access) are imported where
+# the data is first loaded, not here
+from lexus_analytics import EVENTS
+from lexus_catalog import Catalog
+from lexus_fuzzy import fuzzy_for
+from lexus_matcher import SlotScanner, matcher_for
+from lexus_metrics import METRICS, timed
+from lexus_parse import (FUZZY_ACCEPT, GROUP_NOUN, PEOPLE_CUE, detect_family_bucket, extract_name,
+                         extract_slots, fuzzy_parse, norm, norm_from_subset, slot_vocabs)
+from lexus_price import PriceIndex, format_budget, slot_budget
+from lexus_prompts import TREE_PROMPTS, book_for, choices_label
+from lexus_rank import Ranker
+
+EXIT_WORDS = {"quit","exit","q"}
+HELP_WORDS = {"help","h","?"}
+
+# ------------ Knowledge base ------------
+# The line-up (models, blurbs, price ranges) and the synonym maps live in
+# data/catalog.json and data/vocab.json, loaded through the compiled snapshot
+# in lexus_data.py. Each profile is a simple set of attributes; crossovers and
+# SUVs also carry a size. lexus_tree.py compiles the question order from these
+# attributes, so edit the data files rather than the dialog flow.
+# Note: NX has two variants per your spec (exec-lux & fun). GX per your spec (<4, fun).
+
+# Which catalog records each body answer covers
+BODY_GROUPS = {
+    "sedan": ("body", ["sedan"]),
+    "coupe": ("body", ["coupe"]),
+    "crossover_suv": ("body", ["crossover", "suv"]),
+    "electric": ("powertrain", ["electric"]),
+}
+# Questions the decision tree may ask after the body type, in tie-break order,
+# and the vocabulary each is answered from
+TREE_ATTRS = [("size", "size"), ("feel", "feel"), ("persona", "persona")]
+# Tree questions that combine attributes: "executive, family or fun?" is
+# answered from the persona and feel vocabularies and fills that slot.
+# Answers run from the broadest to the most specific; a model that matches
+# several (GX: family and fun) goes under the last. The attributes' other
+# values ("luxury") are accepted as well and narrow the question down
+COMBINED_ATTRS = {"pref": [("executive", "persona"), ("family", "persona"), ("fun", "feel")]}
+# Slots that decide the recommendation, as keys of Knowledge.outcomes
+OUTCOME_SLOTS = ("body",) + tuple(attr for attr, _ in TREE_ATTRS)
+# Slots the reply text depends on, as keys of Knowledge.replies: the group
+# size does not change the model but does rank the runners-up
+REPLY_SLOTS = OUTCOME_SLOTS + ("family",)
+# Ranking weight of each answered slot (lexus_rank.py), and how many runners-up
+# a recommendation lists
+RANK_WEIGHTS = {"body": 3.0, "size": 2.0, "persona": 1.5, "feel": 1.5, "family": 1.0}
+RUNNERS_UP = 2
+RUNNER_UP_MIN_SCORE = 0.5
+
+# ------------ Dialog engine ------------
+# The conversation is an explicit state machine. A session is a plain dict
+# (current stage, name, answered slots) and reply() advances it by exactly one
+# user utterance, returning (bot_text, new_session) with no input()/print().
+# Front ends (lexus_dialog_agent_v3.py, streamlit_app.py, chat_server.py) are thin adapters around it.
+
+ALL_BODIES = ["sedan", "coupe", "crossover_suv", "electric"]
+YES_NO_KEYS = ["yes", "no"]
+
+class Knowledge:
+    """Everything built from one version of the data files.
+
+    The engine reads the current one through knowledge() once per turn, and
+    a reload swaps it as a whole, so a turn never mixes two versions. Only
+    the raw data is read up front; the catalog indexes, the tree and the
+    reply tables are built when a turn first needs them."""
+
+    # English answer parsing; a LocaleKnowledge swaps in its own
+    locale = None
+    extract_name = staticmethod(extract_name)
+    family_bucket = staticmethod(detect_family_bucket)
+    group_noun = GROUP_NOUN
+    people_cue = PEOPLE_CUE
+
+    def __init__(self, data):
+        self.version = data["version"]
+        self.models = data["models"]
+        self.explains = data["explains"]
+        self.price_ranges = data["price_ranges"]
+        self.vocab = data["vocab"]
+        self.yes_no = {"yes": self.vocab["yes"], "no": self.vocab["no"]}
+        self.tree_questions = tree_questions(self.vocab)
+        self.tree_vocab = dict(self.tree_questions)
+        # combined question -> {answer: the slot it fills}
+        self.tree_fields = {attr: dict(combined_answers(self.vocab, attr)) for attr in COMBINED_ATTRS}
+        self._locales = {}
+
+    @cached_property
+    def catalog(self):
+        return Catalog(self.models)
+
+    @cached_property
+    def signature(self):
+        from lexus_tree import signature
+        return signature(self.models, BODY_GROUPS, self.tree_questions, TREE_PROMPTS, COMBINED_ATTRS)
+
+    @cached_property
+    def tree(self):
+        # the precompiled lexus_tree.json when it matches, else compile in memory
+        from lexus_tree import load_tree
+        return load_tree(sig=self.signature) or self.build_tree()
+
+    @cached_property
+    def slot_scanner(self):
+        return SlotScanner(slot_vocabs(self.vocab))
+
+    @cached_property
+    def ranker(self):
+        return Ranker(self.catalog, RANK_WEIGHTS, BODY_GROUPS)
+
+    @cached_property
+    def prices(self):
+        return PriceIndex(self.catalog, self.price_ranges)
+
+    @cached_property
+    def reach(self):
+        # catalog bitmap of the models reachable from each tree node, so a
+        # budget can rule out whole branches
+        nodes, by_name, out = self.tree["nodes"], self.catalog.index["name"], {}
+        def under(ref):
+            if isinstance(ref, str):
+                return by_name.get(ref, 0)
+            bits = 0
+            for child in nodes[ref][2].values():
+                bits |= under(child)
+            out[ref] = bits
+            return bits
+        for ref in self.tree["roots"].values():
+            under(ref)
+        return out
+
+    # Every answer combination that settles the tree, with its reply text
+    # (runners-up included, for each group size) minus the customer's name:
+    # a recommendation is two dict hits
+    @cached_property
+    def outcomes(self):
+        out, implied = {}, {}
+        choices = [[None, *self.tree_vocab[attr]] for attr in OUTCOME_SLOTS[1:]]
+        for body, root in self.tree["roots"].items():
+            for combo in itertools.product(*choices):
+                slots, path = dict(zip(OUTCOME_SLOTS[1:], combo)), []
+                ref = self.walk(slots, root, path)
+                if isinstance(ref, str):
+                    out[(body, *combo)] = ref
+                    fill = self.implied_by(path, slots)
+                    if fill:
+                        implied[(body, *combo)] = fill
+        self._implied = implied
+        return out
+
+    @cached_property
+    def implied(self):
+        """{outcomes key: {slot: value}} for the slots a settled combination
+        implies without naming them: of the sedans, "executive" rather than
+        "fun" is the luxury one."""
+        self.outcomes
+        return self._implied
+
+    @cached_property
+    def edge_slots(self):
+        # (combined question node, answer) -> the slots every model under
+        # that answer agrees on
+        out = {}
+        for ref, (attr, _, children) in enumerate(self.tree["nodes"]):
+            fields = self.tree_fields.get(attr)
+            if fields is None:
+                continue
+            for answer, child in children.items():
+                under = self.models_under(child) & self.models_under(ref)
+                fill = {}
+                for field in dict.fromkeys(fields.values()):
+                    values = self.catalog.values(under, field)
+                    if len(values) == 1:
+                        fill[field] = values[0]
+                out[(ref, answer)] = fill
+        return out
+
+    def implied_by(self, path, slots):
+        """Slots the (node, answer) steps of `path` imply that `slots` lacks."""
+        fill = {}
+        for edge in path:
+            for k, v in self.edge_slots.get(edge, {}).items():
+                if slots.get(k) is None:
+                    fill.setdefault(k, v)
+        return fill
+
+    @cached_property
+    def rendered(self):
+        return {m: self.render(m) for m in self.catalog.values(self.catalog.all, "name")}
+
+    @cached_property
+    def replies(self):
+        return {key + (family,): self.render(model, dict(zip(REPLY_SLOTS, key + (family,))))
+                for key, model in self.outcomes.items() for family in (None, *self.vocab["people"])}
+
+    def localized(self, code):
+        """This Knowledge seen through locale pack `code`, compiled on first use."""
+        view = self._locales.get(code)
+        if view is None:
+            from lexus_locale import LocaleKnowledge
+            with _RELOAD_LOCK:
+                view = self._locales.get(code) or LocaleKnowledge(self, code)
+                self._locales[code] = view
+        return view
+
+    def build_tree(self):
+        from lexus_tree import compile_tree
+        return compile_tree(self.catalog, BODY_GROUPS, self.tree_questions, TREE_PROMPTS, self.signature,
+                            COMBINED_ATTRS)
+
+    def models_under(self, ref):
+        if isinstance(ref, str):
+            return self.catalog.index["name"].get(ref, 0)
+        return self.reach[ref]
+
+    def in_budget(self, slots):
+        """Catalog bitmap of the models priced within the budget slot, or None
+        if there is none (or nothing fits it, in which case it is ignored)."""
+        budget = slots.get("budget")
+        if not budget:
+            return None
+        return self.prices.within(*slot_budget(budget)) or None
+
+    def tree_answer(self, attr, slots, children):
+        """The answer `slots` give to tree question `attr`, or None."""
+        fields = self.tree_fields.get(attr)
+        if fields is None:
+            return slots.get(attr)
+        for answer, field in reversed(COMBINED_ATTRS[attr]):
+            if slots.get(field) == answer:
+                return answer
+        for answer, field in fields.items():  # "luxury" narrows the question
+            if answer in children and slots.get(field) == answer:
+                return answer
+        return None
+
+    def tree_slot(self, attr, answer):
+        """The slot an answer to tree question `attr` fills."""
+        fields = self.tree_fields.get(attr)
+        return attr if fields is None else fields[answer]
+
+    def walk(self, slots, ref, path=None):
+        """Follow tree questions from `ref` while `slots` answers them; a
+        question the budget leaves one branch of is skipped as well. The
+        (node, answer) steps taken are appended to `path`."""
+        nodes = self.tree["nodes"]
+        fits = self.in_budget(slots)
+        while not isinstance(ref, str):
+            attr, _, children = nodes[ref]
+            value = self.tree_answer(attr, slots, children)
+            if value in children:
+                if path is not None:
+                    path.append((ref, value))
+                ref = children[value]
+                continue
+            if fits is not None:
+                left = [c for c in children.values() if self.models_under(c) & fits]
+                if len(left) == 1:
+                    ref = left[0]
+                    continue
+            break
+        return ref
+
+    def bodies_in_budget(self, slots, bodies):
+        fits = self.in_budget(slots)
+        if fits is None:
+            return bodies
+        return [b for b in bodies if self.models_under(self.tree["roots"][b]) & fits] or bodies
+
+    def render(self, model, slots=None):
+        """Recommendation text for `model`, to follow the customer's name;
+        with `slots`, the closest other models are listed too."""
+        lines = [f", my recommendation is: **{model}**"]
+        explain = self.explains.get(model)
+        if explain:
+            lines.append(explain)
+        price = self.price_ranges.get(model)
+        if price:
+            lines.append(f"Approx. price range: {price}")
+        alts = [r for r in self.ranker.top(slots, RUNNERS_UP, exclude=(model,))
+                if r.score >= RUNNER_UP_MIN_SCORE] if slots else []
+        if alts:
+            lines.append("Also worth a look:")
+            for r in alts:
+                n = len(r.matched) + len(r.missed)
+                note = f"matches {len(r.matched)} of {n} answers" + \
+                    (f"; differs on {', '.join(r.missed)}" if r.missed else "")
+                explain = self.explains.get(r.name)
+                lines.append(f"• {r.name}" + (f" — {explain}" if explain else "") + f" ({note})")
+        return "\n".join(lines)
+
+    def warm(self):
+        """Build every index and reply table, and compile every answer matcher
+        and fuzzy index, now instead of on first use."""
+        self.replies, self.implied, self.rendered, self.prices, self.reach, self.slot_scanner
+        for mapping in (self.yes_no, *(v for v in self.vocab.values() if isinstance(v, dict)),
+                        *self.tree_vocab.values()):
+            matcher_for(mapping)
+            fuzzy_for(mapping)
+        return self
+
+def tree_questions(vocab):
+    """[(attr, mapping)] the decision tree may ask, in tie-break order."""
+    out = [(attr, vocab[v]) for attr, v in TREE_ATTRS]
+    fields = dict(TREE_ATTRS)
+    for attr, conds in COMBINED_ATTRS.items():
+        kind = type(vocab[fields[conds[0][1]]])  # a locale's UnicodeVocab stays one
+        out.append((attr, kind((answer, vocab[fields[field]][answer])
+                               for answer, field in combined_answers(vocab, attr))))
+    return out
+
+def combined_answers(vocab, attr):
+    """[(answer, slot)] of combined question `attr`: its own answers, then
+    the other values of the slots it combines."""
+    conds = COMBINED_ATTRS[attr]
+    fields = dict(TREE_ATTRS)
+    own = {answer for answer, _ in conds}
+    return conds + [(v, field) for field in dict.fromkeys(f for _, f in conds)
+                    for v in vocab[fields[field]] if v not in own]
+
+def build_tree():
+    return knowledge().build_tree()
+
+_KB = None
+_WATCHER = None
+_RELOAD_LOCK = threading.Lock()
+
+def _install(kb):
+    global _KB, _WATCHER
+    if _WATCHER is None:
+        import lexus_data
+        _WATCHER = lexus_data.DataWatcher(version=kb.version)
+    _KB = kb
+
+def knowledge():
+    """The current Knowledge; the first call reads the data files."""
+    kb = _KB
+    if kb is None:
+        with _RELOAD_LOCK:
+            if _KB is None:
+                import lexus_data
+                _install(Knowledge(lexus_data.load()))
+            kb = _KB
+    return kb
+
+def __getattr__(name):
+    # lexus_engine.KB: the current Knowledge, loaded on first access
+    if name == "KB":
+        return knowledge()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# ------------ Hot reload ------------
+# reload_data() swaps in edited data files without a restart; watch_data()
+# runs it from a daemon thread. Sessions carry the version they were last
+# advanced with and are re-walked from their slots on their next turn.
+def reload_data():
+    """Install the data files if they changed; returns True after a swap."""
+    with _RELOAD_LOCK:
+        if _KB is None:
+            return False  # nothing loaded yet; the first turn reads the files
+        data = _WATCHER.poll()
+        if data is None:
+            return False
+        _install(Knowledge(data).warm())  # compiled before the swap, not on a live turn
+        return True
+
+def watch_data(interval=2.0):
+    """Poll the data files every `interval` seconds from a daemon thread."""
+    def loop():
+        while not stop.wait(interval):
+            reload_data()
+    stop = threading.Event()
+    threading.Thread(target=loop, name="lexus-data-watch", daemon=True).start()
+    return stop
+
+@timed("render", "format_recommendation")
+def format_recommendation(name, model, kb=None, slots=None):
+    kb = kb or knowledge()
+    text = None
+    if slots is not None:
+        key = tuple(slots.get(k) for k in OUTCOME_SLOTS)
+        if kb.outcomes.get(key) == model:
+            text = kb.replies.get(key + (slots.get("family"),))
+    if text is None:
+        text = kb.rendered.get(model) or kb.render(model, slots)
+    return f"{name}{text}"
+
+def rank(slots, k=3, kb=None):
+    """Top-k models for (partial) answers, best first: [Ranked(name, score, matched, missed)]."""
+    return (kb or knowledge()).ranker.top(slots, k)
+
+def new_session(seed=None, locale=None):
+    # "kb" (the data version) is set on the first turn that reads the data;
+    # "rng" picks the prompt variants, so a seed replays the same transcript
+    s = {"stage": "name", "name": None, "prompt": "", "slots": {}, "node": None, "model": None,
+         "kb": None, "rng": random.getrandbits(64) if seed is None else seed}
+    if locale:
+        s["locale"] = locale
+    return s
+
+def locales():
+    """Codes of the locale packs a session can use besides English."""
+    import lexus_data
+    return lexus_data.locales()
+
+def start(session=None, seed=None, locale=None):
+    """Open a conversation; returns (greeting prompt, session). With `seed`,
+    the conversation's prompt wording is reproducible; with `locale` ("es",
+    "fr", see locales()) answers are also understood in that language."""
+    if locale == "en":
+        locale = None
+    if locale and locale not in locales():
+        raise ValueError(f"no locale pack {locale!r}")
+    if EVENTS.enabled:
+        EVENTS.emit("turn", "start", next="name")
+    return _start(session, seed, locale)
+
+def _start(session=None, seed=None, locale=None):
+    s = new_session(seed, locale) if session is None else dict(session)
+    return _ask(s, "name", "Q_NAME"), s
+
+def _pick(s, n):
+    # the session's own 64-bit LCG (sessions saved without one get a seed now)
+    x = s.get("rng")
+    if x is None:
+        x = random.getrandbits(64)
+    x = (x * 6364136223846793005 + 1442695040888963407) & 0xFFFFFFFFFFFFFFFF
+    s["rng"] = x
+    return (x >> 33) % n
+
+def _ask(s, stage, pid, **extra):
+    s.pop("retries", None)  # a new question ends any re-prompt streak
+    s["stage"] = stage
+    book = book_for(s["name"] or "")
+    texts = book.prompts.get(pid) or book.variants(pid, **extra)
+    s["prompt"] = texts[_pick(s, len(texts))]
+    return s["prompt"]
+
+def _retry(s, msg, pid, **extra):
+    streak = s.get("retries", 0) + 1
+    if METRICS.enabled:
+        METRICS.inc("reprompt", stage_label(s))
+    if EVENTS.enabled:
+        EVENTS.emit("reprompt", stage_label(s), streak=streak)
+    text = msg + "\n" + _ask(s, s["stage"], pid, **extra)
+    s["retries"] = streak
+    return text
+
+def _clarify(s, fm):
+    s["retries"] = s.get("retries", 0) + 1
+    if METRICS.enabled:
+        METRICS.inc("clarification", stage_label(s))
+    if EVENTS.enabled:
+        EVENTS.emit("clarify", stage_label(s), streak=s["retries"])
+    if fm.ambiguous_with:
+        return f"Did you mean {choices_label((fm.key,) + fm.ambiguous_with)}?"
+    s["suggest"] = fm.key  # a "yes" on the next turn takes it
+    return f"Did you mean {fm.term}?"
+
+def _understand(kb, s, raw, mapping, allowed=None, exact=None):
+    """Parse an answer: exact match first, then the fuzzy fallback.
+
+    Returns (key, clarification); both are None when nothing matched.
+    `exact` is the caller's own exact parse, if it has one."""
+    suggest = s.pop("suggest", None)
+    if suggest is not None:
+        yn = norm(raw, kb.yes_no)
+        if yn:
+            return (suggest if yn == "yes" else None), None
+    if exact is None:
+        exact = norm(raw, mapping) if allowed is None else norm_from_subset(raw, mapping, allowed)
+    if exact:
+        return exact, None
+    fm = fuzzy_parse(raw, mapping, allowed)
+    if fm is None:
+        return None, None
+    if fm.confidence >= FUZZY_ACCEPT and not fm.ambiguous_with:
+        return fm.key, None
+    return None, _clarify(s, fm)
+
+def _end(s, text):
+    s["stage"] = "done"
+    return text
+
+def _recommend(kb, s, model):
+    if METRICS.enabled:
+        METRICS.inc("recommendation", model)
+    if EVENTS.enabled:
+        EVENTS.emit("recommend", stage_label(s), model=model)
+    s["model"] = model
+    text = format_recommendation(s["name"], model, kb, s["slots"])
+    budget = s["slots"].get("budget")
+    # no note when nothing fits the budget and in_budget() ignores it
+    if budget and kb.in_budget(s["slots"]) is not None:
+        budget = slot_budget(budget)
+        if not kb.prices.fits(model, *budget):
+            text += f"\nNote: its price range falls outside your budget ({format_budget(budget)})."
+    return _end(s, text)
+
+def _allowed_bodies(s):
+    return ["crossover_suv", "electric"] if s["slots"].get("family") == ">=4" else ALL_BODIES
+
+def _prefill(kb, s, raw):
+    # slots already answered keep their first value; a body type in the
+    # keep-same answer is the current one, kept only on a yes (_on_keep_same)
+    keep_same = s["stage"] == "keep_same"
+    for slot, value in extract_slots(raw, kb).items():
+        if not (keep_same and slot == "body"):
+            s["slots"].setdefault(slot, value)
+
+def _advance(kb, s):
+    # next pre-tree question, skipping whatever the slots already answer
+    slots = s["slots"]
+    if "body" in slots:
+        if slots["body"] in _allowed_bodies(s):
+            return _route_body(kb, s, slots["body"])
+        del slots["body"]  # ruled out by the group size; ask again
+    if "keep_same" not in slots:
+        return _ask(s, "keep_same", "Q_KEEP_SAME")
+    if slots["keep_same"] == "yes":
+        return _ask(s, "current_type", "Q_CURRENT_TYPE")
+    if "family" not in slots:
+        return _ask(s, "people", "Q_PEOPLE")
+    # a budget can leave a single body type; any allowed one is still accepted
+    offered = kb.bodies_in_budget(slots, _allowed_bodies(s))
+    if len(offered) == 1:
+        return _route_body(kb, s, offered[0])
+    return _ask(s, "body", "Q_BODY_LIMITED", choices=choices_label(offered))
+
+def _descend(kb, s, ref):
+    # ref is a node index, or a model name once the tree reaches a leaf;
+    # answered slots settle it in one lookup, else walk to the next question
+    slots = s["slots"]
+    key = tuple(slots.get(k) for k in OUTCOME_SLOTS)
+    model = kb.outcomes.get(key)
+    if model is not None:
+        _imply(s, kb.implied.get(key))
+        return _recommend(kb, s, model)
+    path = []
+    ref = kb.walk(slots, ref, path)
+    _imply(s, kb.implied_by(path, slots))
+    if isinstance(ref, str):
+        return _recommend(kb, s, ref)
+    s["node"] = ref
+    return _ask(s, "ask", kb.tree["nodes"][ref][1])
+
+def _imply(s, fill):
+    # slots the tree's answers settle without the customer naming them
+    if fill:
+        for k, v in fill.items():
+            s["slots"].setdefault(k, v)
+
+def _route_body(kb, s, body):
+    s["slots"]["body"] = body
+    if body == "electric":
+        return _ask(s, "rz_confirm", "Q_RZ_CONFIRM")
+    return _descend(kb, s, kb.tree["roots"][body])
+
+def _resume(kb, s):
+    """Move a session onto `kb` after a data reload; returns a reply if the
+    pending question went away, else None and the turn goes on as usual."""
+    s["kb"] = kb.version
+    if s["stage"] != "ask":
+        return None
+    ref = kb.tree["roots"].get(s["slots"].get("body"))
+    if ref is None:
+        s["slots"].pop("body", None)
+        return _advance(kb, s)
+    ref = kb.walk(s["slots"], ref)
+    if isinstance(ref, str):
+        return _recommend(kb, s, ref)
+    s["node"] = ref
+    return None
+
+def _on_name(kb, s, raw):
+    name = kb.extract_name(raw)
+    if not name or name.lower() == "friend":
+        return _retry(s, "Please share your name so I can address you properly.", "Q_NAME")
+    s["name"] = name
+    return _ask(s, "intent", "Q_BRAND_INTENT")
+
+def _on_intent(kb, s, raw):
+    intent, clarify = _understand(kb, s, raw, kb.yes_no, YES_NO_KEYS)
+    if not intent:
+        return clarify or _retry(s, "Please answer yes or no.", "Q_BRAND_INTENT")
+    s["slots"]["intent"] = intent
+    if intent == "no":
+        if EVENTS.enabled:
+            EVENTS.emit("end", "intent", reason="declined")
+        return _end(s, "No worries! If you ever want Lexus recommendations, just say hi. Have a great day!")
+    return _advance(kb, s)
+
+def _on_keep_same(kb, s, raw):
+    keep_same, clarify = _understand(kb, s, raw, kb.yes_no, YES_NO_KEYS)
+    if not keep_same:
+        return clarify or _retry(s, "Please answer yes or no.", "Q_KEEP_SAME")
+    s["slots"]["keep_same"] = keep_same
+    if keep_same == "yes":
+        body = extract_slots(raw, kb).get("body")  # "yes, I drive a sedan"
+        if body:
+            s["slots"].setdefault("body", body)
+    return _advance(kb, s)
+
+def _on_current_type(kb, s, raw):
+    body, clarify = _understand(kb, s, raw, kb.vocab["bodies"], ALL_BODIES)
+    if not body:
+        return clarify or _retry(s, f"Please choose one of: {choices_label(ALL_BODIES)}.", "Q_CURRENT_TYPE")
+    return _route_body(kb, s, body)
+
+def _on_people(kb, s, raw):
+    # a count ("three plus me") outranks the synonyms it contains ("three");
+    # a group size _prefill already took from this answer stands
+    people = kb.vocab["people"]
+    family, clarify = _understand(kb, s, raw, people, exact=kb.family_bucket(raw) or norm(raw, people))
+    if not family:
+        return clarify or _retry(s, "Please choose: <4 or >=4.", "Q_PEOPLE")
+    s["slots"].setdefault("family", family)
+    return _advance(kb, s)
+
+def _on_body(kb, s, raw):
+    allowed = _allowed_bodies(s)
+    body, clarify = _understand(kb, s, raw, kb.vocab["bodies"], allowed)
+    if not body:
+        offered = choices_label(kb.bodies_in_budget(s["slots"], allowed))
+        return clarify or _retry(s, f"Please choose one of: {offered}.", "Q_BODY_LIMITED", choices=offered)
+    return _route_body(kb, s, body)
+
+def _on_rz_confirm(kb, s, raw):
+    ev, clarify = _understand(kb, s, raw, kb.yes_no)
+    if clarify:
+        return clarify
+    s["slots"]["ev"] = "yes" if ev == "yes" else "no"
+    if s["slots"]["ev"] == "yes":
+        return _recommend(kb, s, "RZ")
+    # If no, fall back to crossover_suv pool
+    if EVENTS.enabled:
+        EVENTS.emit("fallback", "rz_confirm", to="crossover_suv")
+    return _route_body(kb, s, "crossover_suv")
+
+def _on_ask(kb, s, raw):
+    attr, pid, children = kb.tree["nodes"][s["node"]]
+    keys = list(children)
+    ans, clarify = _understand(kb, s, raw, kb.tree_vocab[attr], keys)
+    if not ans:
+        return clarify or _retry(s, f"Please choose: {choices_label(keys)}.", pid)
+    s["slots"][kb.tree_slot(attr, ans)] = ans
+    _imply(s, kb.implied_by([(s["node"], ans)], s["slots"]))
+    return _descend(kb, s, children[ans])
+
+HANDLERS = {
+    "name": _on_name,
+    "intent": _on_intent,
+    "keep_same": _on_keep_same,
+    "current_type": _on_current_type,
+    "people": _on_people,
+    "body": _on_body,
+    "rz_confirm": _on_rz_confirm,
+    "ask": _on_ask,
+}
+
+def stage_label(s):
+    # tree questions are labelled by the attribute they ask
+    if s["stage"] == "ask":
+        kb = knowledge()
+        if s.get("kb") != kb.version:
+            return "ask"  # node of an older tree; re-walked on its next turn
+        return "ask:" + kb.tree["nodes"][s["node"]][0]
+    return s["stage"]
+
+def reply(session, text):
+    """Advance `session` by one user utterance; returns (bot_text, new_session).
+
+    The input session is left untouched. A finished session ("done") starts
+    over, so a front end can keep feeding it messages. Set session["profile"]
+    to a label to collect a cProfile for that session in METRICS."""
+    if METRICS.enabled or EVENTS.enabled or (session is not None and session.get("profile")):
+        return _instrumented_reply(session, text)
+    return _reply(session, text)
+
+def _instrumented_reply(session, text):
+    label = stage_label(session) if session is not None else "start"
+    profile = session.get("profile") if session is not None else None
+    t0 = time.perf_counter()
+    # profiling a session does not switch the turn timers on
+    if METRICS.enabled:
+        if profile:
+            out = METRICS.profiled(profile, METRICS.time_call, "turn", label, _reply, session, text)
+        else:
+            out = METRICS.time_call("turn", label, _reply, session, text)
+    elif profile:
+        out = METRICS.profiled(profile, _reply, session, text)
+    else:
+        out = _reply(session, text)
+    if EVENTS.enabled:
+        EVENTS.emit("turn", label, next=stage_label(out[1]),
+                    ms=round((time.perf_counter() - t0) * 1e3, 3))
+    return out
+
+def _reply(session, text):
+    if session is None or session["stage"] == "done":
+        if session is None:
+            return _start()
+        return _start(seed=session.get("rng"), locale=session.get("locale"))
+    s = dict(session)
+    s["slots"] = dict(session["slots"])
+    raw = text.strip()
+    low = raw.lower()
+    if low in EXIT_WORDS:
+        if EVENTS.enabled:
+            EVENTS.emit("end", stage_label(s), reason="exit")
+        return _end(s, "Exiting. Thanks for stopping by!"), s
+    kb = knowledge()  # one data version for the whole turn
+    if s.get("locale"):
+        kb = kb.localized(s["locale"])
+    if s.get("kb") != kb.version:
+        moved = _resume(kb, s)
+        if moved is not None:
+            return moved, s
+    if low in HELP_WORDS:
+        return "Tips: short answers work best. Type 'quit' to exit.\n" + s["prompt"], s
+    if s["stage"] != "name":
+        _prefill(kb, s, raw)
+    return HANDLERS[s["stage"]](kb, s, raw), s
@@ -0,0 +1,157 @@
+# lexus_fuzzy.py
+# Typo-tolerant matching for the answer vocabularies ("sedn", "luxery").
+#  - Symmetric-deletion index: every term and every typed word are reduced to
+#    the deletions of their first PREFIX characters, so candidates come from a
+#    bounded number of dict lookups whatever the vocabulary size
+#  - Candidates are verified with an optimal-string-alignment edit distance
+#  - Each match carries a confidence; close calls are reported as ambiguous
+#    so the dialog can ask a clarifying question instead of guessing
+
+import functools, itertools, re
+from collections import namedtuple
+
+from lexus_matcher import UnicodeVocab
+
+FuzzyMatch = namedtuple("FuzzyMatch", "key confidence heard term ambiguous_with")
+
+MIN_LEN = 3          # words/terms shorter than this are never fuzzed ("no", "ev")
+PREFIX = 7           # only this many leading characters go into the index
+AMBIGUITY_GAP = 0.05 # another key this close in confidence makes a match ambiguous
+
+_WORDS = re.compile(r"[a-z0-9][a-z0-9'/\-]*")
+_UNICODE_WORDS = re.compile(r"[^\W_](?:[^\W_]|['/\-])*")  # for UnicodeVocab mappings
+_serials = itertools.count()
+
+def max_edits(n):
+    # one typo for short words, two from eight letters up
+    return 1 if n < 8 else 2
+
+@functools.lru_cache(maxsize=8192)
+def _deletes(word, depth):
+    # memoized: typed words repeat across turns and sessions
+    out = {word}
+    frontier = out
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out = out | frontier
+    return frozenset(out)
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance, or limit + 1 once it exceeds limit.
+
+    Only the diagonal band |i - j| <= limit is filled."""
+    la, lb = len(a), len(b)
+    big = limit + 1
+    if abs(la - lb) > limit:
+        return big
+    prev2 = None
+    prev = [j if j <= limit else big for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        cur = [big] * (lb + 1)
+        if i <= limit:
+            cur[0] = i
+        row_min = cur[0]
+        ai = a[i - 1]
+        for j in range(max(1, i - limit), min(lb, i + limit) + 1):
+            cost = ai != b[j - 1]
+            v = prev[j - 1] + cost
+            x = prev[j] + 1
+            if x < v:
+                v = x
+            x = cur[j - 1] + 1
+            if x < v:
+                v = x
+            if cost and i > 1 and j > 1 and ai == b[j - 2] and a[i - 2] == b[j - 1]:
+                x = prev2[j - 2] + 1
+                if x < v:
+                    v = x
+            cur[j] = v if v < big else big
+            if v < row_min:
+                row_min = v
+        if row_min > limit:
+            return big
+        prev2, prev = prev, cur
+    return prev[lb]
+
+class FuzzyMatcher:
+    """Symmetric-deletion index over one {key: {synonyms}} mapping."""
+
+    def __init__(self, mapping, max_distance=2):
+        self.serial = next(_serials)
+        self.keys = list(mapping.keys())
+        self.max_distance = max_distance
+        self._words = _UNICODE_WORDS if isinstance(mapping, UnicodeVocab) else _WORDS
+        self._term_key = {}
+        for k in self.keys:
+            for t in (k, *mapping[k]):
+                t = " ".join(t.strip().lower().split())
+                if len(t) >= MIN_LEN and any(ch.isalpha() for ch in t):
+                    self._term_key.setdefault(t, k)  # first key wins, as in norm()
+        self._index = {}
+        for t in self._term_key:
+            for d in _deletes(t[:PREFIX], min(max_distance, max_edits(len(t)))):
+                self._index.setdefault(d, []).append(t)
+        # term lengths per word count, so out-of-reach phrases are skipped early
+        self._lengths = {}
+        for t in self._term_key:
+            self._lengths.setdefault(len(t.split()), set()).add(len(t))
+
+    def _phrases(self, text):
+        words = self._words.findall(text)
+        for n, lengths in self._lengths.items():
+            for i in range(len(words) - n + 1):
+                phrase = " ".join(words[i:i + n])
+                L = len(phrase)
+                reach = min(self.max_distance, max_edits(L))
+                if L >= MIN_LEN and any(abs(L - tl) <= reach for tl in lengths):
+                    yield phrase
+
+    def match(self, ans, allowed_keys=None):
+        """Best FuzzyMatch for `ans`, or None when no term is within reach."""
+        a = ans.strip().lower()
+        rank = {k: i for i, k in enumerate(self.keys)} if allowed_keys is None else \
+            {k: i for i, k in reversed(list(enumerate(allowed_keys)))}
+        best = {}  # key -> (confidence, heard, term)
+        for phrase in self._phrases(a):
+            limit = min(self.max_distance, max_edits(len(phrase)))
+            seen = set()
+            index = self._index
+            for d in _deletes(phrase[:PREFIX], limit):
+                hits = index.get(d)
+                if hits is None:
+                    continue
+                for t in hits:
+                    if t in seen:
+                        continue
+                    seen.add(t)
+                    if abs(len(t) - len(phrase)) > limit:
+                        continue
+                    k = self._term_key[t]
+                    if k not in rank:
+                        continue
+                    dist = edit_distance(phrase, t, limit)
+                    if dist > limit:
+                        continue
+                    conf = 1.0 - dist / max(len(phrase), len(t))
+                    if k not in best or conf > best[k][0]:
+                        best[k] = (conf, phrase, t)
+        if not best:
+            return None
+        order = sorted(best, key=lambda k: (-best[k][0], rank[k]))
+        top = order[0]
+        conf, heard, term = best[top]
+        close = tuple(k for k in order[1:] if conf - best[k][0] <= AMBIGUITY_GAP)
+        return FuzzyMatch(top, round(conf, 3), heard, term, close)
+
+_FUZZY = {}
+_MAX_FUZZY = 64
+
+def fuzzy_for(mapping):
+    hit = _FUZZY.get(id(mapping))
+    if hit is not None and hit[0] is mapping:
+        return hit[1]
+    m = FuzzyMatcher(mapping)
+    if len(_FUZZY) >= _MAX_FUZZY:
+        _FUZZY.pop(next(iter(_FUZZY)))
+    _FUZZY[id(mapping)] = (mapping, m)
+    return m
@@ -0,0 +1,100 @@
+# lexus_locale.py
+# Locale packs: understanding answers in other languages.
+#  - data/locales/<code>.json holds a language's words for each vocabulary
+#    of data/vocab.json, its number words, group-size cues and name forms
+#    ("me llamo ...", "je m'appelle ...")
+#  - LocaleKnowledge puts one pack on top of a Knowledge: every vocabulary is
+#    the English one plus the pack's words (customers mix in "SUV" or "ok"),
+#    compiled into its own matchers, fuzzy indexes and slot scanner, with its
+#    own number parser and name pattern; the catalog, tree and reply tables
+#    stay shared
+#  - Knowledge.localized() builds a view on the first turn of the first
+#    session in that language, once per data version; a process that only
+#    serves English never imports this module or reads a pack
+#  - Prompts and recommendations stay in English
+
+import re
+
+from lexus_engine import tree_questions
+from lexus_fuzzy import fuzzy_for
+from lexus_matcher import SlotScanner, UnicodeVocab, matcher_for
+from lexus_parse import (GROUP_NOUN, NAME_PATTERNS, NUM_WORDS, PEOPLE_CUE, _JOIN, _SELF, CountParser,
+                         detect_family_bucket, slot_vocabs)
+
+# {name} in a pack's name patterns: a name in any script ("José García",
+# "Hélène"); like the English patterns it may run to several words and
+# extract_name() keeps the first
+_NAME = r"([^\W\d_](?:[^\W\d_]|[\-' ])*)"
+_NON_NAME = re.compile(r"[^\w\-' ]|[\d_]")
+_TRAILING_PUNCT = re.compile(r"[\.!\?¡¿]+\s*$")
+_TOKENS = re.compile(r"\d+|[^\W\d_]+|\+")
+
+def _merge(english, extra, what):
+    if not isinstance(english, dict):
+        return english | extra
+    unknown = set(extra) - set(english)
+    if unknown:
+        raise ValueError(f"locale pack: unknown {what} answers {sorted(unknown)}")
+    return UnicodeVocab((k, terms | extra.get(k, set())) for k, terms in english.items())
+
+def _words_pattern(english, words):
+    # the English pattern, or any of the pack's words
+    if not words:
+        return english
+    alts = "|".join(re.escape(w.lower()) for w in sorted(words, key=lambda w: (-len(w), w)))
+    return re.compile(f"{english.pattern}|\\b(?:{alts})\\b")
+
+class LocaleKnowledge:
+    """A Knowledge seen through one locale pack; anything the pack does not
+    change is read from the Knowledge underneath."""
+
+    def __init__(self, kb, code):
+        import lexus_data
+        pack = lexus_data.load_locale(code)
+        self._kb = kb
+        self.locale = code
+        extra = pack["vocab"]
+        unknown = set(extra) - set(kb.vocab)
+        if unknown:
+            raise ValueError(f"locale pack {code!r}: unknown vocabularies {sorted(unknown)}")
+        self.vocab = {name: _merge(terms, extra.get(name, {} if isinstance(terms, dict) else set()), name)
+                      for name, terms in kb.vocab.items()}
+        self.yes_no = UnicodeVocab(yes=self.vocab["yes"], no=self.vocab["no"])
+        self.tree_vocab = dict(tree_questions(self.vocab))
+        self.slot_scanner = SlotScanner(slot_vocabs(self.vocab))
+        self.counter = CountParser({**NUM_WORDS, **pack.get("num_words", {})},
+                                   _SELF | set(pack.get("self_words", ())),
+                                   _JOIN | set(pack.get("join_words", ())),
+                                   tokens=_TOKENS, tag=("family_bucket", code))
+        self.people_cue = _words_pattern(PEOPLE_CUE, pack.get("people_cues"))
+        self.group_noun = _words_pattern(GROUP_NOUN, pack.get("group_nouns"))
+        # the pack's name forms first, then the English ones; as in
+        # lexus_parse, one lookahead per form and the earliest form wins
+        forms = [p.replace("{name}", _NAME) for p in pack.get("name_patterns", ())] + NAME_PATTERNS
+        self._name_forms = re.compile("^" + "".join(f"(?:(?=(?s:.*?){p})|)" for p in forms))
+
+    def __getattr__(self, name):
+        return getattr(self._kb, name)
+
+    def extract_name(self, raw):
+        s = _TRAILING_PUNCT.sub("", raw.strip())
+        for cand in self._name_forms.match(s.lower()).groups():
+            if cand:
+                parts = cand.split()
+                if parts:
+                    return parts[0].capitalize()
+        for t in reversed(s.split()):
+            t = _NON_NAME.sub("", t).strip()
+            if t:
+                return t.capitalize()
+        return "Friend"
+
+    def family_bucket(self, ans):
+        return detect_family_bucket(ans, self.counter)
+
+    def warm(self):
+        """Compile this locale's matchers and fuzzy indexes now."""
+        for mapping in (self.yes_no, *(v for v in self.vocab.values() if isinstance(v, dict)),
+                        *self.tree_vocab.values()):
+            matcher_for(mapping)
+            fuzzy_for(mapping)
@@ -0,0 +1,148 @@
+# lexus_matcher.py
+# Precompiled synonym matcher for the dialog's answer vocabularies.
+#  - Each mapping {key: {synonyms}} is compiled once into a single regex
+#  - One scan over the answer resolves it to its canonical key
+#  - Keeps the old first-match priority (mapping order, or allowed_keys order)
+#  - SlotScanner reads several vocabularies in the same single scan
+#  - Word boundaries are ASCII; a UnicodeVocab mapping (locale packs) gets
+#    Unicode letters instead, so English patterns stay as fast as they were
+
+import itertools, re
+
+_serials = itertools.count()
+
+class UnicodeVocab(dict):
+    """A {key: {synonyms}} mapping whose terms and answers may use any
+    letters ("sí", "électrique"), not only ASCII."""
+
+ASCII_WORD = "[a-z0-9]"
+UNICODE_WORD = r"[^\W_]"
+
+def _word(mapping):
+    return UNICODE_WORD if isinstance(mapping, UnicodeVocab) else ASCII_WORD
+
+def _term_pattern(term, word=ASCII_WORD):
+    body = re.escape(term)
+    # Same rule as the old _contains_term: word boundaries for alphanumeric
+    # terms, plain substring for symbol-only terms.
+    if any(ch.isalnum() for ch in term):
+        return f"(?<!{word})" + body + f"(?!{word})"
+    return body
+
+def _alternation(key, mapping, word=ASCII_WORD):
+    terms = {t.strip().lower() for t in (key, *mapping[key])}
+    terms.discard("")
+    # Longest first so multi-word synonyms are tried before their prefixes
+    return "|".join(_term_pattern(t, word) for t in sorted(terms, key=lambda t: (-len(t), t)))
+
+class TermMatcher:
+    """Resolve free-form answers to canonical keys of a synonym mapping.
+
+    Every key gets one alternative inside a single lookahead, ordered by key
+    priority, so each position of the text reports the best key starting
+    there; the answer's key is the best over all positions."""
+
+    def __init__(self, mapping):
+        self.serial = next(_serials)  # stable id for cache keys
+        self.keys = list(mapping.keys())
+        self._rank = {k: i for i, k in enumerate(self.keys)}
+        self._single = []
+        alts = []
+        word = _word(mapping)
+        for k in self.keys:
+            alt = _alternation(k, mapping, word)
+            self._single.append(re.compile(f"(?:{alt})") if alt else None)
+            alts.append(f"(?:{alt})()" if alt else "(?!)()")
+        self._scan = re.compile("(?=" + "|".join(alts) + ")") if alts else None
+
+    def match(self, ans, allowed_keys=None):
+        """Return the canonical key found in `ans`, or None.
+
+        With `allowed_keys`, only those keys are considered and their order
+        decides priority; the compiled pattern is reused as is."""
+        if self._scan is None:
+            return None
+        a = ans.strip().lower()
+        if allowed_keys is None:
+            best = None
+            for m in self._scan.finditer(a):
+                i = m.lastindex - 1
+                if best is None or i < best:
+                    best = i
+                    if i == 0:
+                        break
+            return None if best is None else self.keys[best]
+
+        order = {}
+        for k in allowed_keys:
+            if k in self._rank:
+                order.setdefault(k, len(order))
+        if not order:
+            return None
+        ranks = [self._rank[k] for k in order]
+        monotone = ranks == sorted(ranks)
+        best = None
+        for m in self._scan.finditer(a):
+            i = m.lastindex - 1
+            k = self.keys[i] if self.keys[i] in order else None
+            if k is None or not monotone:
+                # Another allowed key may start at the same position with a
+                # lower mapping priority but a better allowed_keys rank.
+                pos = m.start()
+                for j in range(i + 1, len(self.keys)):
+                    kk = self.keys[j]
+                    if kk in order and (k is None or order[kk] < order[k]) \
+                            and self._single[j] is not None and self._single[j].match(a, pos):
+                        k = kk
+                if k is None:
+                    continue
+            if best is None or order[k] < order[best]:
+                best = k
+                if order[k] == 0:
+                    break
+        return best
+
+class SlotScanner:
+    """Resolve every slot mentioned in an answer in one scan.
+
+    `slots` is a list of (slot, mapping). Within a slot the mapping order
+    decides, as in TermMatcher.match(); where terms of two slots start at the
+    same position ("sport utility" / "sport") the earlier slot wins."""
+
+    def __init__(self, slots):
+        self.serial = next(_serials)
+        self._groups = []  # group number - 1 -> (slot, key, rank within slot)
+        alts = []
+        for slot, mapping in slots:
+            word = _word(mapping)
+            for rank, k in enumerate(mapping):
+                alt = _alternation(k, mapping, word)
+                alts.append(f"(?:{alt})()" if alt else "(?!)()")
+                self._groups.append((slot, k, rank))
+        self._scan = re.compile("(?=" + "|".join(alts) + ")") if alts else None
+
+    def scan(self, ans):
+        """Return {slot: key} for every slot found in `ans`."""
+        if self._scan is None:
+            return {}
+        best = {}
+        for m in self._scan.finditer(ans.strip().lower()):
+            slot, k, rank = self._groups[m.lastindex - 1]
+            if slot not in best or rank < best[slot][0]:
+                best[slot] = (rank, k)
+        return {slot: k for slot, (_, k) in best.items()}
+
+# Compiled matchers keyed by mapping identity. Mappings are treated as
+# read-only once compiled; a new dict object gets its own matcher.
+_MATCHERS = {}
+_MAX_MATCHERS = 64
+
+def matcher_for(mapping):
+    hit = _MATCHERS.get(id(mapping))
+    if hit is not None and hit[0] is mapping:
+        return hit[1]
+    m = TermMatcher(mapping)
+    if len(_MATCHERS) >= _MAX_MATCHERS:
+        _MATCHERS.pop(next(iter(_MATCHERS)))
+    _MATCHERS[id(mapping)] = (mapping, m)
+    return m
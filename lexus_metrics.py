@@ -0,0 +1,129 @@
+# lexus_metrics.py
+# Lightweight instrumentation for the dialog flow.
+#  - Timers (count/sum/max) for every parse call and every turn, by stage
+#  - Counters for re-prompts, clarifying questions and recommendations
+#  - Export as Prometheus text or a JSON dump
+#  - Opt-in cProfile for a single session
+# Everything is off by default; a disabled timer costs one attribute check.
+
+import functools, time
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.timers = {}    # (metric, label) -> [count, total_seconds, max_seconds]
+        self.counters = {}  # (metric, label) -> int
+        self.profiles = {}  # profile label -> cProfile.Profile
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.timers.clear()
+        self.counters.clear()
+        self.profiles.clear()
+
+    def observe(self, metric, label, seconds):
+        t = self.timers.get((metric, label))
+        if t is None:
+            self.timers[(metric, label)] = [1, seconds, seconds]
+        else:
+            t[0] += 1
+            t[1] += seconds
+            if seconds > t[2]:
+                t[2] = seconds
+
+    def inc(self, metric, label, n=1):
+        self.counters[(metric, label)] = self.counters.get((metric, label), 0) + n
+
+    def time_call(self, metric, label, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.observe(metric, label, time.perf_counter() - t0)
+
+    # ------------ Profiling ------------
+    def profiled(self, label, fn, *args):
+        """Run fn(*args) under the cProfile collector for `label`."""
+        prof = self.profiles.get(label)
+        if prof is None:
+            import cProfile  # profiling is opt-in; keep it off the import path
+            prof = self.profiles[label] = cProfile.Profile()
+        prof.enable()
+        try:
+            return fn(*args)
+        finally:
+            prof.disable()
+
+    def profile_stats(self, label, limit=25, sort="cumulative"):
+        prof = self.profiles.get(label)
+        if prof is None:
+            return ""
+        import io, pstats
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    # ------------ Export ------------
+    def to_dict(self):
+        return {
+            "timers": [{"metric": m, "label": l, "count": c, "sum_s": s, "max_s": mx}
+                       for (m, l), (c, s, mx) in sorted(self.timers.items())],
+            "counters": [{"metric": m, "label": l, "value": v}
+                         for (m, l), v in sorted(self.counters.items())],
+        }
+
+    def dump(self, path):
+        import json
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def prometheus_text(self):
+        lines, seen, maxes = [], set(), []
+        for (metric, label), (count, total, mx) in sorted(self.timers.items()):
+            name, key = _METRIC_NAMES[metric]
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} summary")
+            lines.append(f'{name}_count{{{key}="{label}"}} {count}')
+            lines.append(f'{name}_sum{{{key}="{label}"}} {total:.9f}')
+            maxes.append((f"{name}_max", f'{name}_max{{{key}="{label}"}} {mx:.9f}'))
+        for name, line in maxes:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(line)
+        for (metric, label), value in sorted(self.counters.items()):
+            name, key = _METRIC_NAMES[metric]
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f'{name}{{{key}="{label}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+# metric -> (Prometheus name, label key)
+_METRIC_NAMES = {
+    "parse": ("lexus_parse_seconds", "fn"),
+    "turn": ("lexus_turn_seconds", "stage"),
+    "render": ("lexus_render_seconds", "fn"),
+    "reprompt": ("lexus_reprompts_total", "stage"),
+    "clarification": ("lexus_clarifications_total", "stage"),
+    "recommendation": ("lexus_recommendations_total", "model"),
+}
+
+METRICS = Metrics()
+
+def timed(metric, label):
+    """Decorator: time calls into `metric{label}` while METRICS is enabled."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return fn(*args, **kwargs)
+            return METRICS.time_call(metric, label, fn, *args, **kwargs)
+        return wrapper
+    return deco
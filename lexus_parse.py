@@ -0,0 +1,225 @@
+# lexus_parse.py
+# Answer parsing for the dialog: names, keyword answers, group sizes, slots.
+#  - extract_name(): the customer's name from "my name is ..." style answers
+#  - norm() / norm_from_subset(): exact vocabulary answers through the
+#    compiled matchers in lexus_matcher.py; fuzzy_parse() for typos
+#  - detect_family_bucket(): group size from free-form text
+#  - extract_slots(): every slot one utterance answers, in one scan
+#  - The name forms, number words and group-size cues here are English;
+#    lexus_locale.py compiles the same pieces from a locale pack
+# Matchers compile on first use of a vocabulary, not at import.
+
+import os, re
+
+from lexus_cache import MISS, LRUCache
+from lexus_fuzzy import fuzzy_for
+from lexus_matcher import matcher_for
+from lexus_metrics import timed
+from lexus_price import budget_slot, parse_budget, strip_money
+
+# ------------ Name handling ------------
+NAME_PATTERNS = [
+    r"\bmy\s+name\s+is\s+([a-zA-Z][a-zA-Z\-' ]+)$",
+    r"\bi\s*am\s+([a-zA-Z][a-zA-Z\-' ]+)$",
+    r"\bi'm\s+([a-zA-Z][a-zA-Z\-' ]+)$",
+    r"\bthis\s+is\s+([a-zA-Z][a-zA-Z\-' ]+)$",
+    r"\bit'?s\s+([a-zA-Z][a-zA-Z\-' ]+)$",
+]
+# All NAME_PATTERNS folded into one compiled pattern: one optional lookahead
+# per form, in list order, so a single match() call reports every form that
+# applies and the earliest one in the list wins, as before.
+_NAME_FORMS = re.compile("^" + "".join(f"(?:(?=(?s:.*?){p})|)" for p in NAME_PATTERNS))
+_NON_NAME = re.compile(r"[^A-Za-z\-' ]")
+_TRAILING_PUNCT = re.compile(r"[\.!\?]+\s*$")
+
+def clean_word(w): return _NON_NAME.sub("", w).strip()
+@timed("parse", "extract_name")
+def extract_name(raw: str) -> str:
+    s = _TRAILING_PUNCT.sub("", raw.strip())
+    for cand in _NAME_FORMS.match(s.lower()).groups():
+        if cand:
+            parts = cand.split()
+            if parts: return parts[0].capitalize()
+    # Fallback: last word that still has name characters
+    for t in reversed(s.split()):
+        t = clean_word(t)
+        if t: return t.capitalize()
+    return "Friend"
+
+def extract_names(utterances):
+    """Batch mode for backfilling transcripts: one name per utterance."""
+    return [extract_name(u) for u in utterances]
+
+# ------------ Answer parsing ------------
+def _contains_term(ans: str, term: str) -> bool:
+    a = ans.strip().lower()
+    t = term.strip().lower()
+    if not t:
+        return False
+    # Use regex boundaries for alphanumerics; allow separators like "/" and "-" within terms
+    if any(ch.isalnum() for ch in t):
+        pattern = r"(?<![A-Za-z0-9])" + re.escape(t) + r"(?![A-Za-z0-9])"
+        return re.search(pattern, a) is not None
+    # Fallback simple substring for non-alphanumeric terms
+    return t in a
+
+# Parse results are memoized on (normalized text, matcher, allowed subset).
+# Size via LEXUS_PARSE_CACHE_SIZE (0 disables); PARSE_CACHE.stats() reports
+# hits/misses/evictions.
+PARSE_CACHE = LRUCache(int(os.environ.get("LEXUS_PARSE_CACHE_SIZE", "4096")))
+
+@timed("parse", "norm")
+def norm(ans, mapping):
+    # direct key match or contained key word, first key in mapping order wins
+    m = matcher_for(mapping)
+    a = ans.strip().lower()
+    key = (a, m.serial, None)
+    hit = PARSE_CACHE.get(key)
+    return PARSE_CACHE.put(key, m.match(a)) if hit is MISS else hit
+
+
+@timed("parse", "norm_from_subset")
+def norm_from_subset(ans, mapping, allowed_keys):
+    # same as norm(), restricted to allowed_keys and ranked by their order
+    m = matcher_for(mapping)
+    a = ans.strip().lower()
+    key = (a, m.serial, tuple(allowed_keys))
+    hit = PARSE_CACHE.get(key)
+    return PARSE_CACHE.put(key, m.match(a, allowed_keys)) if hit is MISS else hit
+
+# Typo-tolerant fallback ("sedn", "crosover", "luxery"); see lexus_fuzzy.py.
+# Matches at or above FUZZY_ACCEPT confidence are taken as-is, anything
+# weaker or ambiguous turns into a "Did you mean ...?" question.
+FUZZY_ACCEPT = 0.8
+
+@timed("parse", "fuzzy_parse")
+def fuzzy_parse(ans, mapping, allowed_keys=None):
+    """Closest FuzzyMatch for `ans` in `mapping` (optionally within allowed_keys), or None."""
+    f = fuzzy_for(mapping)
+    a = ans.strip().lower()
+    key = (a, ("fuzzy", f.serial), None if allowed_keys is None else tuple(allowed_keys))
+    hit = PARSE_CACHE.get(key)
+    return PARSE_CACHE.put(key, f.match(a, allowed_keys)) if hit is MISS else hit
+
+# --- Helper for robustly parsing crew size from free-form text ---
+NUM_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "couple": 2, "a couple": 2, "few": 3,
+}
+
+# One compiled tokenizer: digit runs, letter runs and the "+" sign. Number
+# words (including multi-word ones like "a couple") are looked up per token.
+_QTY_TOKENS = re.compile(r"\d+|[a-z]+|\+")
+_SELF = {"me", "myself"}
+_JOIN = {"plus", "+", "and", "with"}
+
+class CountParser:
+    """Group sizes from free-form text, for one language's number words."""
+
+    def __init__(self, num_words, self_words, join_words, tokens=_QTY_TOKENS, tag="family_bucket"):
+        self.tokens = tokens
+        self.phrases = {tuple(tokens.findall(w)): v for w, v in num_words.items()}
+        self.phrase_len = max(len(k) for k in self.phrases)
+        self.self_words = self_words
+        self.join_words = join_words
+        self.tag = tag  # parse cache key of detect_family_bucket()
+
+    def count(self, ans: str):
+        """Return the group size mentioned in `ans`, or None.
+
+        Single scan over the tokens: digits and number words count, ranges
+        ("4-5", "five or six") resolve to their upper end, "5+" to 5, and
+        "plus me" / "me and 3" add the speaker."""
+        phrases, plen, selfw, join = self.phrases, self.phrase_len, self.self_words, self.join_words
+        toks = self.tokens.findall(ans.lower())
+        best = None
+        me = False
+        for i, tok in enumerate(toks):
+            if tok.isdigit():
+                n = int(tok)
+            else:
+                n = None
+                for L in range(1, min(plen, i + 1) + 1):
+                    n = phrases.get(tuple(toks[i - L + 1:i + 1]), n)
+                if n is None:
+                    if (tok in selfw and i and toks[i - 1] in join) or \
+                            (tok in join and i and toks[i - 1] in selfw):
+                        me = True
+                    continue
+            if best is None or n > best:
+                best = n
+        if best is None:
+            return None
+        return best + 1 if me else best
+
+_COUNT = CountParser(NUM_WORDS, _SELF, _JOIN)
+extract_count = _COUNT.count
+
+@timed("parse", "detect_family_bucket")
+def detect_family_bucket(ans: str, counter=None):
+    """Return '<4' or '>=4' if we can infer group size from free-form input like
+    'like 6 people', 'usually two', 'i have 5 people in my family',
+    'three plus me', '4-5'. If none detected, return None.
+    `counter` is another language's CountParser."""
+    if counter is None:
+        counter = _COUNT
+    a = ans.strip().lower()
+    key = (a, counter.tag, None)
+    hit = PARSE_CACHE.get(key)
+    if hit is not MISS:
+        return hit
+    n = counter.count(strip_money(a))  # "under 60k for me" is not 60 people
+    if n is None:
+        return PARSE_CACHE.put(key, None)
+    return PARSE_CACHE.put(key, ">=4" if n >= 4 else "<4")
+
+# --- Slot filling: everything one utterance says, in one scan ---
+# "I need a full-size SUV for my family of six, luxury please" answers the
+# body, size, feel and group-size questions at once. Only exact vocabulary
+# matches count here; the fuzzy fallback stays with the question being asked.
+SLOT_ATTRS = [("body", "bodies"), ("size", "size"), ("persona", "persona"), ("feel", "feel")]
+# "family of six", "my family" and "a large family" describe the group, not
+# the family persona or the vehicle size; they are masked before the scan
+GROUP_NOUN = re.compile(r"\b(?:(?:small|little|big|large|huge)\s+famil(?:y|ies)"
+                        r"|(?:my|our)\s+famil(?:y|ies)|family\s+of)\b")
+# numbers only count as a group size next to a word about people ("2-door" is not)
+PEOPLE_CUE = re.compile(r"\b(?:people|persons?|passengers?|seats?|family|kids|children|us|me|adults)\b")
+
+def slot_vocabs(vocab):
+    """(slot, mapping) pairs for a SlotScanner over `vocab`. Size words that
+    also answer the people question ("small") are left out: they say more
+    about the group than about the vehicle."""
+    people = {t.lower() for terms in vocab["people"].values() for t in terms}
+    out = []
+    for slot, v in SLOT_ATTRS:
+        mapping = vocab[v]
+        if slot == "size":
+            mapping = type(mapping)((k, {t for t in terms if t.lower() not in people})
+                                    for k, terms in mapping.items())
+        out.append((slot, mapping))
+    return out
+
+@timed("parse", "extract_slots")
+def extract_slots(ans, kb=None):
+    """Return {slot: value} for every slot mentioned in `ans` (body, size,
+    persona, feel, family, budget). The result is shared through the parse cache;
+    treat it as read-only."""
+    if kb is None:
+        from lexus_engine import knowledge  # the engine imports this module
+        kb = knowledge()
+    scanner = kb.slot_scanner
+    a = ans.strip().lower()
+    key = (a, ("slots", scanner.serial), None)
+    hit = PARSE_CACHE.get(key)
+    if hit is not MISS:
+        return hit
+    found = scanner.scan(kb.group_noun.sub(" ", a))
+    if kb.people_cue.search(a):
+        family = kb.family_bucket(a)
+        if family:
+            found["family"] = family
+    budget = parse_budget(a)
+    if budget:
+        found["budget"] = budget_slot(budget)
+    return PARSE_CACHE.put(key, found)
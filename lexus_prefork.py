@@ -0,0 +1,267 @@
+# lexus_prefork.py
+# Prefork serving: one master, N forked dialog workers.
+#  - The master loads the data and builds everything read-only once
+#    (Knowledge.warm(): catalog, answer matchers, fuzzy indexes, reply and
+#    recommendation tables), then gc.freeze()s it and forks; the workers
+#    share those pages copy-on-write instead of each holding its own copy
+#  - A session lives in one worker, chosen by hashing its id (route());
+#    ids a worker hands out hash back to that worker, so a session never
+#    moves and each worker's session table stays private
+#  - The master talks to each worker over a socketpair: length-prefixed
+#    marshal frames, answered in order, so requests can be pipelined
+#  - WorkerPool is also a ChatServer back end: PreforkServer relays /chat
+#    and /ws to the workers (`python chat_server.py --workers 4`)
+#  - A request that fails in a worker, or a worker that dies, raises
+#    WorkerError; ChatServer answers it with a 500 (or a WS error frame)
+#  - POSIX only (os.fork)
+
+import asyncio, gc, marshal, os, random, secrets, signal, socket, struct, traceback, zlib
+from collections import deque
+
+import lexus_dialog_agent_v3 as agent
+from chat_server import ChatServer, SessionTable, WorkerError, _payload
+from lexus_analytics import EVENTS, EventLog
+from lexus_store import open_store
+
+_HEAD = struct.Struct("<I")
+
+def route(sid, n):
+    """Index of the worker that owns session `sid` among `n`."""
+    return zlib.crc32(sid.encode()) % n
+
+def sid_for(index, n):
+    """A new session id that routes to worker `index`."""
+    while True:
+        sid = secrets.token_hex(8)
+        if route(sid, n) == index:
+            return sid
+
+def warm():
+    """Build the shared read-only state in the master, before forking."""
+    agent.knowledge().warm()
+    # move everything alive now out of the collector's reach: a collection
+    # in a worker would otherwise write to every object header it visits
+    # and unshare the pages
+    gc.collect()
+    gc.freeze()
+
+def memory(pid="self"):
+    """{Rss, Pss, Private_Dirty, Shared_Clean, Shared_Dirty} of a process in kB
+    (Linux /proc); empty where that is not available."""
+    out = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Private_Dirty", "Shared_Clean", "Shared_Dirty"):
+                    out[key] = int(rest.split()[0])
+    except OSError:
+        pass
+    return out
+
+# ------------ Worker ------------
+def _send(sock, obj):
+    data = marshal.dumps(obj)
+    sock.sendall(_HEAD.pack(len(data)) + data)
+
+def _serve(sock, table):
+    """Answer requests from the master until it hangs up."""
+    rfile = sock.makefile("rb")
+    while True:
+        try:
+            head = rfile.read(_HEAD.size)
+        except ConnectionResetError:
+            return
+        if len(head) < _HEAD.size:
+            return
+        op, *args = marshal.loads(rfile.read(_HEAD.unpack(head)[0]))
+        try:
+            if op == "turn":
+                sid, text, session = table.turn(*args)
+                out = (sid, _payload(sid, text, session))
+            elif op == "open":
+                sid, text, session = table.open(*args)
+                out = (sid, _payload(sid, text, session))
+            elif op == "drop":
+                out = table.drop(*args)
+            elif op == "len":
+                out = len(table)
+            elif op == "sweep":
+                table.evict_idle()
+                out = agent.reload_data() if args[0] else False
+            elif op == "memory":
+                out = memory()
+            else:
+                raise ValueError(f"unknown request {op!r}")
+        except Exception as e:  # the worker outlives a bad request
+            out = ("error", f"{type(e).__name__}: {e}")
+        try:
+            _send(sock, out)
+        except (BrokenPipeError, ConnectionResetError):
+            return  # the master hung up while we were answering
+
+def _worker(index, n, sock, idle_timeout, store, events):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the master shuts us down
+    random.seed()  # every worker starts from the master's RNG state otherwise
+    if events:
+        EVENTS.attach(EventLog(f"{events}.{index}"))
+    table = SessionTable(idle_timeout, open_store(store, idle_timeout), lambda: sid_for(index, n))
+    try:
+        _serve(sock, table)
+    finally:
+        sock.close()
+
+# ------------ Master ------------
+class _Link:
+    """The master's end of one worker's socketpair; replies come back in
+    request order, so each pending request is a future in a FIFO."""
+
+    def __init__(self, pid, sock):
+        self.pid = pid
+        self.sock = sock
+        self._reader = self._writer = self._task = None
+        self._pending = deque()
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(sock=self.sock)
+        self._task = asyncio.create_task(self._receive())
+
+    async def _receive(self):
+        try:
+            while True:
+                n = _HEAD.unpack(await self._reader.readexactly(_HEAD.size))[0]
+                out = marshal.loads(await self._reader.readexactly(n))
+                self._pending.popleft().set_result(out)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            while self._pending:
+                self._pending.popleft().set_exception(WorkerError(f"worker {self.pid} went away: {e!r}"))
+
+    async def call(self, *req):
+        if self._task.done():
+            raise WorkerError(f"worker {self.pid} is gone")
+        data = marshal.dumps(req)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append(fut)
+        self._writer.write(_HEAD.pack(len(data)) + data)
+        out = await fut
+        if isinstance(out, tuple) and out and out[0] == "error":
+            raise WorkerError(out[1])
+        return out
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()  # the worker exits on EOF
+            self._task.cancel()
+        else:
+            self.sock.close()
+
+class WorkerPool:
+    """N forked workers, each owning the sessions whose ids hash to it.
+
+    start() forks and must run before the master starts its event loop;
+    connect() then attaches the links inside the loop."""
+
+    def __init__(self, workers=os.cpu_count() or 1, idle_timeout=900.0, store=None, events=None):
+        self.size = workers
+        self.idle_timeout = idle_timeout
+        self.store = store
+        self.events = events
+        self.links = []
+
+    def start(self, prewarm=True):
+        if prewarm:
+            warm()
+        for index in range(self.size):
+            parent, child = socket.socketpair()
+            pid = os.fork()
+            if pid == 0:
+                code = 0
+                try:
+                    parent.close()
+                    for link in self.links:  # earlier workers' sockets
+                        link.sock.close()
+                    _worker(index, self.size, child, self.idle_timeout, self.store, self.events)
+                except BaseException:
+                    traceback.print_exc()
+                    code = 1
+                finally:
+                    os._exit(code)
+            child.close()
+            self.links.append(_Link(pid, parent))
+        return self
+
+    async def connect(self):
+        for link in self.links:
+            await link.connect()
+
+    def link(self, sid):
+        return self.links[route(sid, self.size)]
+
+    async def open(self, profile=False, locale=None):
+        # spread new sessions evenly; the worker picks an id that hashes to it
+        return await random.choice(self.links).call("open", profile, locale)
+
+    async def turn(self, sid, text):
+        return await self.link(sid).call("turn", sid, text)
+
+    async def drop(self, sid):
+        await self.link(sid).call("drop", sid)
+
+    async def sessions(self):
+        return sum(await asyncio.gather(*(link.call("len") for link in self.links)))
+
+    async def sweep(self, reload_data=True):
+        await asyncio.gather(*(link.call("sweep", reload_data) for link in self.links))
+
+    async def memory(self):
+        """{pid: memory()} for every worker."""
+        got = await asyncio.gather(*(link.call("memory") for link in self.links))
+        return dict(zip((link.pid for link in self.links), got))
+
+    async def close(self):
+        for link in self.links:
+            await link.close()
+        self.join()
+
+    def join(self):
+        for link in self.links:
+            try:
+                os.waitpid(link.pid, 0)
+            except ChildProcessError:
+                pass
+        self.links = []
+
+class PreforkServer(ChatServer):
+    """ChatServer whose sessions live in a WorkerPool. /metrics, /profile and
+    /analytics describe the master only; with --events each worker writes
+    its own PATH.<index> (lexus_analytics.py reads several files)."""
+
+    def __init__(self, pool, sweep_every=30.0, reload_data=True):
+        super().__init__(pool.idle_timeout, sweep_every, reload_data, store=open_store("memory"))
+        self.pool = pool
+
+    async def open(self, profile=False, locale=None):
+        return await self.pool.open(profile, locale)
+
+    async def turn(self, sid, text):
+        return await self.pool.turn(sid, text)
+
+    async def drop(self, sid):
+        await self.pool.drop(sid)
+
+    async def sessions(self):
+        return await self.pool.sessions()
+
+    async def sweep_once(self):
+        await self.pool.sweep(self.reload_data)
+        if self.reload_data:
+            agent.reload_data()  # keeps /health's data version current
+
+    async def start(self, host="127.0.0.1", port=8765):
+        await self.pool.connect()
+        return await super().start(host, port)
+
+    async def close(self):
+        await super().close()
+        await self.pool.close()
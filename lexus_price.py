@@ -0,0 +1,140 @@
+# lexus_price.py
+# Numeric prices and budgets.
+#  - parse_range(): display strings ("$80K–$115K", "$60K-100K") -> (low, high)
+#  - parse_budget(): "under 60k", "around $50,000", "between 40 and 55k"
+#    -> (low, high), high may be inf
+#  - PriceIndex: price intervals sorted by low and by high end, with prefix /
+#    suffix bitmaps over the catalog, so "which models overlap this budget"
+#    is two bisects and one AND whatever the catalog size
+
+import math, re
+from bisect import bisect_left, bisect_right
+
+_RANGE = re.compile(r"\$?\s*(\d+(?:\.\d+)?)\s*(k?)\s*(?:[–—-]|\bto\b|\band\b)\s*"
+                    r"\$?\s*(\d+(?:\.\d+)?)\s*(k?)", re.I)
+_THOUSANDS_SEP = re.compile(r"(?<=\d),(?=\d{3})")
+
+# An amount of money: "$50,000", "60k", "55 thousand", "$48500"
+_MONEY = re.compile(r"(\$\s*)?(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*(k\b|thousand\b|grand\b)?")
+_BELOW = re.compile(r"\b(?:under|below|less than|at most|max(?:imum)?|up to|no more than|within|cheaper than|tops)\b")
+_ABOVE = re.compile(r"\b(?:over|above|more than|at least|min(?:imum)?|starting at|upwards of)\b")
+# words that make a bare number a budget: "budget is 50000", "under 45000"
+_BUDGET_CUE = re.compile(r"(?:\b(?:budget|spend|spending|afford|pay|paying|price|cost|around|about|roughly|"
+                         r"approximately)\b|" + _BELOW.pattern + "|" + _ABOVE.pattern + r")(?:\W+\w+){0,2}\W*$")
+AROUND = 0.10  # "around $50,000" means +/- 10%
+
+def _k(amount, k):
+    v = float(amount)
+    return v * 1000 if k else v
+
+def _range(m):
+    lo_k, hi_k = m.group(2), m.group(4)
+    # "$60K-100K": a suffix on either end applies to both
+    k = lo_k or hi_k
+    lo, hi = _k(m.group(1), lo_k or k), _k(m.group(3), hi_k or k)
+    return (lo, hi) if lo <= hi else (hi, lo)
+
+def parse_range(text):
+    """(low, high) in dollars for a range like "$80K–$115K" or "40k to 55k", or None."""
+    m = _RANGE.search(_THOUSANDS_SEP.sub("", text or ""))
+    return _range(m) if m else None
+
+def money_amounts(text, strict=True):
+    """[(dollars, start, end)] for every amount of money in `text`.
+
+    A bare number (no "$", "k", "thousand" or "grand") counts only from 1,000
+    up and right after a budget word ("budget is 50000", "under 45000"), so
+    "5 of us", "since 2019" and zip codes are not prices. With strict=False
+    any bare number from 1,000 up counts."""
+    a = text.lower()
+    out = []
+    for m in _MONEY.finditer(a):
+        dollar, num, unit = m.groups()
+        v = float(num.replace(",", ""))
+        if unit:
+            v *= 1000
+        elif not dollar and (v < 1000 or (strict and not _BUDGET_CUE.search(a, 0, m.start()))):
+            continue
+        out.append((v, m.start(), m.end()))
+    return out
+
+def strip_money(text):
+    """`text` with its amounts of money, and any other number too large to
+    be a group size ("since 2019"), blanked out."""
+    for _, start, end in reversed(money_amounts(text, strict=False)):
+        text = text[:start] + " " + text[end:]
+    return text
+
+def parse_budget(text):
+    """(low, high) for a budget mentioned in `text`, or None."""
+    a = text.lower()
+    plain = _THOUSANDS_SEP.sub("", a)
+    m = _RANGE.search(plain)
+    # "4-5 people" and "2019-2021" are not budgets
+    if m and (m.group(2) or m.group(4) or "$" in m.group(0) or _BUDGET_CUE.search(plain, 0, m.start())):
+        span = _range(m)
+        if span[1] >= 1000:
+            return span
+    amounts = money_amounts(a)
+    if not amounts:
+        return None
+    v, start, _ = amounts[0]
+    before = a[:start]
+    if _BELOW.search(before):
+        return (0.0, v)
+    if _ABOVE.search(before):
+        return (v, math.inf)
+    return (round(v * (1 - AROUND)), round(v * (1 + AROUND)))
+
+# As a dialog slot a budget is a plain string ("0-60000", "80000-"), so
+# sessions stay serializable
+def budget_slot(budget):
+    lo, hi = budget
+    return f"{lo:.0f}-" + ("" if hi == math.inf else f"{hi:.0f}")
+
+def slot_budget(value):
+    lo, _, hi = value.partition("-")
+    return (float(lo), float(hi) if hi else math.inf)
+
+def format_budget(budget):
+    lo, hi = budget
+    if hi == math.inf:
+        return f"over ${lo / 1000:.0f}K"
+    if lo <= 0:
+        return f"under ${hi / 1000:.0f}K"
+    return f"${lo / 1000:.0f}K–${hi / 1000:.0f}K"
+
+class PriceIndex:
+    """Catalog records by price interval, for budget range queries."""
+
+    def __init__(self, catalog, price_ranges):
+        self.catalog = catalog
+        self.ranges = {}
+        spans = []  # (low, high, bitmap of the model's records)
+        for name, bits in catalog.index.get("name", {}).items():
+            r = parse_range(price_ranges.get(name, ""))
+            if r is not None:
+                self.ranges[name] = r
+                spans.append((r[0], r[1], bits))
+        by_low = sorted(spans, key=lambda t: t[0])
+        by_high = sorted(spans, key=lambda t: t[1])
+        self._lows = [t[0] for t in by_low]
+        self._highs = [t[1] for t in by_high]
+        # _low_prefix[i]: records among the i cheapest lows;
+        # _high_suffix[i]: records from the i-th lowest high end on
+        self._low_prefix = [0]
+        for t in by_low:
+            self._low_prefix.append(self._low_prefix[-1] | t[2])
+        self._high_suffix = [0]
+        for t in reversed(by_high):
+            self._high_suffix.append(self._high_suffix[-1] | t[2])
+        self._high_suffix.reverse()
+
+    def within(self, low, high):
+        """Bitmap of records whose price range overlaps [low, high]."""
+        return self._low_prefix[bisect_right(self._lows, high)] & \
+            self._high_suffix[bisect_left(self._highs, low)]
+
+    def fits(self, name, low, high):
+        r = self.ranges.get(name)
+        return r is not None and r[0] <= high and r[1] >= low
@@ -0,0 +1,188 @@
+# lexus_prompts.py
+# What the assistant says: question variants per stage ({name} and
+# {choices} are filled in per session) and the variants used for each
+# decision-tree question. Each variant is compiled once into a Template and
+# rendered per customer name by book_for(); see "Compiled templates" below.
+
+import functools
+from string import Formatter
+
+from lexus_cache import MISS, LRUCache
+
+# ------------ Question variants ------------
+Q_NAME = [
+    "Welcome to Lexus. May I have your name so I can provide a more personal experience?",
+    "It’s a pleasure to meet you. May I have your name so I can assist you properly?",
+    "Welcome to the Lexus showroom. How may I address you today?"
+]
+Q_BODY = [
+    "{name}, which body style are you interested in exploring today? (Sedan / Coupe / Crossover/SUV / Electric)",
+    "Let’s begin with the type of vehicle you’re drawn to, {name}: Sedan, Coupe, Crossover/SUV, or Electric?"
+]
+Q_BODY_LIMITED = [
+    "Based on your needs, {name}, which body style would you like to focus on: {choices}?",
+    "Given your typical passengers, {name}, which body type makes the most sense: {choices}?"
+]
+Q_OK_WITH = [
+    "These are the matching options: {options}. Good with focusing on these, {name}? (yes/no)",
+    "Here’s what fits that type: {options}. Stick with these, {name}? (yes/no)",
+]
+Q_PEOPLE = [
+    "How many people do you usually travel with, {name}? (for example, 2 or 5+)",
+    "Roughly how many passengers do you often have, {name}? (1–3 or 4+)"
+]
+Q_PERSONA = [
+    "And in terms of lifestyle, {name}, would you describe yourself as more executive or family-focused? (executive/family)",
+    "Would you say your ideal Lexus complements an executive lifestyle or suits a family-oriented one, {name}? (executive/family)"
+]
+Q_FEEL = [
+    "Let’s talk about how you’d like your new Lexus to drive, {name}.\n• Luxury — a serene, quiet ride that exudes refinement\n• Fun — a more dynamic, engaging experience\n(luxury/fun)",
+    "When you picture driving your new Lexus, {name}, do you lean toward luxurious comfort or a sportier, fun feel? (luxury/fun)"
+]
+
+Q_RZ_CONFIRM = [
+    "{name}, Lexus offers a single all-electric model—the **RZ**. It’s a refined, quiet crossover with instant torque. Approx. price range: $45K–$60K. Shall we proceed with RZ? (yes/no)",
+    "Quick note, {name}: the all-electric option is the **RZ**, an elegant crossover with seamless power. Estimated price band: $45K–$60K. Would you like to go with RZ? (yes/no)",
+]
+
+
+Q_BRAND_INTENT = [
+    "Wonderful to meet you, {name}. Are you considering joining the Lexus family today? (yes/no)",
+    "Quick question, {name}: is Lexus the brand you'd like to explore right now? (yes/no)",
+    "Before we begin, {name}, are you exploring Lexus vehicles today? (yes/no)"
+]
+
+# --- New prompts for keeping same car type ---
+Q_KEEP_SAME = [
+    "Would you like to keep the same car type you have now, {name}? (yes/no)",
+    "Do you want to stick with your current car type, {name}? (yes/no)",
+    "Should we keep the same body style you drive today, {name}? (yes/no)",
+]
+Q_CURRENT_TYPE = [
+    "What type do you drive now, {name}? (sedan / coupe / crossover_suv / electric)",
+    "Which body style is your current car, {name}? (sedan / coupe / crossover_suv / electric)",
+    "Tell me your current type, {name}: sedan, coupe, crossover_suv, or electric",
+]
+
+Q_SIZE = [
+    "For your Crossover or SUV, {name}, which size best fits your lifestyle?\n• Compact — easy maneuverability, lower cost\n• Mid-size — balanced comfort and performance\n• Full-size — spacious, three rows, elevated presence\n(compact/mid-size/full-size)",
+    "Let’s find the right fit, {name}: Compact for agility, Mid-size for balance, or Full-size for maximum space and comfort? (compact/mid-size/full-size)"
+]
+Q_COUPE_FEEL = [
+    "For your Coupe, which personality suits you, {name}?\n• Luxury — grand‑touring poise and comfort\n• Fun — playful, sporty dynamics\n(luxury/fun)",
+    "Coupe character, {name}:\nLuxury = GT comfort and polish.\nFun = sharper, more spirited feel.\n(luxury/fun)",
+]
+Q_SEDAN_PERSONA = [
+    "And the overall vibe for your Sedan, {name}?\n• Executive — premium ambiance, advanced tech, refined materials\n• Family — space, ease of use, and everyday comfort\n(executive/family)",
+    "Last preference for the Sedan, {name}:\nExecutive = upscale, polished feel.\nFamily = practicality and comfort for passengers.\n(executive/family)",
+]
+Q_COMPACT_PERSONA = [
+    "For a Compact Crossover, which focus do you prefer, {name}?\n• Executive — premium ambiance and tech\n• Family — comfort, versatility, and ease of use\n(executive/family)",
+]
+Q_MIDSIZE_PREF = [
+    "Within Mid‑size, what should we emphasize, {name}?\n• Executive — refined, quiet, premium experience\n• Family — comfort, versatility, and serene ride\n• Fun — adventurous look and capability\n(executive/family/fun)",
+]
+Q_COMPACT_PREF = [
+    "For a Compact Crossover, which focus do you prefer, {name}?\n• Executive — premium ambiance and tech\n• Family — comfort, versatility, and ease of use\n• Fun — nimble, sporty character\n(executive/family/fun)",
+]
+Q_SEDAN_PREF = [
+    "And the overall vibe for your Sedan, {name}?\n• Executive — premium ambiance, advanced tech, refined materials\n• Family — space, ease of use, and everyday comfort\n• Fun — sportier handling and a more engaging drive\n(executive/family/fun)",
+    "Last preference for the Sedan, {name}:\nExecutive = upscale, polished feel.\nFamily = practicality and comfort for passengers.\nFun = lively, engaging, sport‑leaning.\n(executive/family/fun)",
+]
+Q_PREF = [
+    "What should your new Lexus be about, {name}?\n• Executive — premium, polished, quiet\n• Family — space, comfort, and ease of use\n• Fun — lively, engaging, sport‑leaning\n(executive/family/fun)",
+]
+Q_FULLSIZE_PERSONA = [
+    "For a Full‑size SUV, which direction suits you best, {name}?\n• Executive — presence, premium materials, quiet cabin\n• Family — maximum space, easy access, road‑trip comfort\n(executive/family)",
+]
+
+# ------------ Question tree ------------
+# Prompt variants for a tree question, by (context, attribute). The context is
+# the body type or an earlier answer; the most specific one wins and
+# (None, attribute) is the fallback.
+TREE_PROMPTS = {
+    ("sedan", "persona"): "Q_SEDAN_PERSONA",
+    ("coupe", "feel"): "Q_COUPE_FEEL",
+    ("crossover_suv", "size"): "Q_SIZE",
+    ("sedan", "pref"): "Q_SEDAN_PREF",
+    ("compact", "persona"): "Q_COMPACT_PERSONA",
+    ("compact", "pref"): "Q_COMPACT_PREF",
+    ("mid-size", "pref"): "Q_MIDSIZE_PREF",
+    ("full-size", "persona"): "Q_FULLSIZE_PERSONA",
+    (None, "feel"): "Q_FEEL",
+    (None, "persona"): "Q_PERSONA",
+    (None, "pref"): "Q_PREF",
+    (None, "size"): "Q_SIZE",
+}
+PROMPTS = {pid: globals()[pid] for pid in set(TREE_PROMPTS.values())}
+
+def choices_label(keys):
+    keys = list(keys)
+    if len(keys) == 0:
+        return ""
+    if len(keys) == 1:
+        return keys[0]
+    if len(keys) == 2:
+        return f"{keys[0]} or {keys[1]}"
+    return ", ".join(keys[:-1]) + ", or " + keys[-1]
+
+# ------------ Compiled templates ------------
+# Every variant is parsed once into literal segments and field names. The
+# variants that only need the customer's name are rendered once per name
+# (PromptBook, shared by all sessions with that name), so asking a question
+# is a tuple index; the network front ends get each text's JSON bytes from
+# json_bytes(), encoded once. The engine picks the variant with the
+# session's own RNG.
+
+class Template:
+    """One prompt variant as (literal, field) pairs; field is None after the last literal."""
+    __slots__ = ("text", "parts", "fields")
+
+    def __init__(self, text):
+        self.text = text
+        parts = []
+        for literal, field, spec, conv in Formatter().parse(text):
+            if spec or conv:
+                raise ValueError(f"format specs are not supported in prompts: {text!r}")
+            parts.append((literal, field))
+        self.parts = tuple(parts)
+        self.fields = frozenset(f for _, f in parts if f is not None)
+
+    def render(self, values):
+        return "".join([lit if f is None else lit + values[f] for lit, f in self.parts])
+
+# prompt id ("Q_SIZE") -> its compiled variants
+TEMPLATES = {pid: tuple(Template(t) for t in variants)
+             for pid, variants in list(globals().items()) if pid.startswith("Q_")}
+_NAME_ONLY = [pid for pid, ts in TEMPLATES.items() if all(t.fields <= {"name"} for t in ts)]
+
+_JSON = LRUCache(4096)
+
+def json_bytes(text):
+    """`text` as a JSON string literal in UTF-8 bytes, cached: the same prompt
+    texts come back turn after turn."""
+    hit = _JSON.get(text)
+    if hit is MISS:
+        import json  # only the network front ends ask for bytes
+        hit = _JSON.put(text, json.dumps(text).encode())
+    return hit
+
+class PromptBook:
+    """Every name-only prompt rendered for one customer name: {prompt id: (texts)}."""
+
+    def __init__(self, name):
+        self.name = name
+        values = {"name": name}
+        self.prompts = {pid: tuple(t.render(values) for t in TEMPLATES[pid]) for pid in _NAME_ONLY}
+
+    def variants(self, pid, **extra):
+        texts = self.prompts.get(pid)
+        if texts is None:  # needs more than the name, e.g. {choices}
+            values = {"name": self.name, **extra}
+            texts = tuple(t.render(values) for t in TEMPLATES[pid])
+        return texts
+
+@functools.lru_cache(maxsize=1024)
+def book_for(name):
+    """The PromptBook for `name`, rendered on first use and shared."""
+    return PromptBook(name)
@@ -0,0 +1,120 @@
+# lexus_rank.py
+# Ranked recommendations: score the whole catalog against partial answers.
+#  - Each answer is a weighted condition over one catalog attribute
+#    ("crossover_suv" -> body in {crossover, suv})
+#  - With NumPy, records are one-hot rows and scoring is one matrix-vector
+#    product per query
+#  - Without it, the catalog bitmaps are combined per subset of satisfied
+#    conditions, best subsets first, so the cost depends on the number of
+#    answers rather than the number of trims
+#  - Results are distinct model names with their score and which answers
+#    they match; ties keep catalog order in both paths
+
+from collections import namedtuple
+from itertools import combinations
+
+try:
+    import numpy as np
+except ImportError:  # optional; the bitmap path gives the same ranking
+    np = None
+
+Ranked = namedtuple("Ranked", "name score matched missed")
+
+class Ranker:
+    """Top-k models for a set of answered slots.
+
+    weights: {slot: weight}; groups: {body answer: (attr, [values])}, used for
+    the "body" slot, other slots match the catalog attribute of the same name."""
+
+    def __init__(self, catalog, weights, groups, use_numpy=None):
+        self.catalog = catalog
+        self.weights = weights
+        self.groups = groups
+        self.names = catalog.columns["name"]
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        if self.use_numpy:
+            self._features = {}
+            for attr in {a for a, _ in groups.values()} | set(weights):
+                for value in catalog.index.get(attr, {}):
+                    self._features[(attr, value)] = len(self._features)
+            self._matrix = np.zeros((catalog.size, len(self._features)), dtype=np.float32)
+            for (attr, value), f in self._features.items():
+                for i in catalog.ids(catalog.index[attr][value]):
+                    self._matrix[i, f] = 1.0
+
+    def conditions(self, slots):
+        """[(slot, attr, values, weight)] for the answered slots that are scored."""
+        out = []
+        for slot, w in self.weights.items():
+            value = slots.get(slot)
+            if value is None:
+                continue
+            attr, values = self.groups[value] if slot == "body" else (slot, [value])
+            out.append((slot, attr, values, w))
+        return out
+
+    def top(self, slots, k=3, exclude=()):
+        conds = self.conditions(slots)
+        total = sum(w for *_, w in conds) or 1.0
+        ids = self._top_numpy(conds, k, exclude) if self.use_numpy else self._top_bits(conds, k, exclude)
+        out = []
+        for i in ids:
+            matched = [slot for slot, attr, values, _ in conds if self.catalog.columns[attr][i] in values]
+            missed = [slot for slot, *_ in conds if slot not in matched]
+            score = sum(w for slot, *_, w in conds if slot in matched) / total
+            out.append(Ranked(self.names[i], round(score, 3), matched, missed))
+        return out
+
+    def _pick(self, order, k, exclude):
+        seen, ids = set(exclude), []
+        for i in order:
+            name = self.names[i]
+            if name not in seen:
+                seen.add(name)
+                ids.append(i)
+                if len(ids) == k:
+                    break
+        return ids
+
+    def _top_numpy(self, conds, k, exclude):
+        q = np.zeros(len(self._features), dtype=np.float32)
+        for _, attr, values, w in conds:
+            for v in values:
+                f = self._features.get((attr, v))
+                if f is not None:
+                    q[f] = w
+        scores = self._matrix @ q
+        return self._pick(np.argsort(-scores, kind="stable").tolist(), k, exclude)
+
+    def _top_bits(self, conds, k, exclude):
+        cat = self.catalog
+        by_name = cat.index["name"]
+        bits = [cat.narrow_any(cat.all, attr, values) for _, attr, values, _ in conds]
+        n = len(conds)
+        left = cat.all
+        for name in exclude:
+            left &= ~by_name.get(name, 0)
+        # every subset of satisfied conditions, highest total weight first;
+        # equal totals form one group, ranked by catalog order
+        groups = {}
+        for r in range(n + 1):
+            for sub in combinations(range(n), r):
+                groups.setdefault(round(sum(conds[j][3] for j in sub), 9), []).append(sub)
+        ids = []
+        for score in sorted(groups, reverse=True):
+            group = 0
+            for sub in groups[score]:
+                cands = left
+                for j in range(n):
+                    cands &= bits[j] if j in sub else ~bits[j]
+                group |= cands
+            while group:
+                i = (group & -group).bit_length() - 1
+                ids.append(i)
+                if len(ids) == k:
+                    return ids
+                # one entry per model: drop its other trims everywhere
+                same = by_name[self.names[i]]
+                group &= ~same
+                left &= ~same
+        return ids
@@ -0,0 +1,215 @@
+# lexus_store.py
+# Session store for dialog state and chat history.
+#  - Sessions are packed with struct: stages, slot names and slot values are
+#    one-byte codes, other strings length-prefixed (~150 bytes, most of it
+#    the pending question's text)
+#  - History is bounded per session (last N turns), never a full transcript
+#  - MemoryStore: in-process LRU with TTL, for a single worker or tests
+#  - SQLiteStore: one WAL-mode SQLite file, shared by every worker on the host
+#    and surviving restarts
+#  - open_store("memory") / open_store("sqlite:/path/to/sessions.db");
+#    LEXUS_SESSION_STORE picks the default
+
+import json, os, sqlite3, struct, threading, time
+from collections import OrderedDict
+
+FORMAT = 1
+HISTORY = 20           # turns kept per session
+MAX_TEXT = 4096        # characters kept per stored message
+
+# Frequent strings, encoded as their index. Append only: the codes are part
+# of the stored format.
+_TABLE = [
+    "name", "intent", "keep_same", "current_type", "people", "body", "rz_confirm", "ask", "done",
+    "family", "size", "feel", "persona", "ev", "yes", "no", "<4", ">=4",
+    "sedan", "coupe", "crossover_suv", "electric", "compact", "mid-size", "full-size",
+    "luxury", "fun", "executive",
+    "RZ", "LS", "ES", "IS", "LC", "RC", "UX", "NX", "RX", "GX", "LX", "TX",
+    "budget",
+]
+_CODE = {s: i for i, s in enumerate(_TABLE)}
+_NONE, _STR = 0xFE, 0xFF
+_KEYS = ("stage", "name", "prompt", "model", "kb", "suggest", "profile")
+
+def _put(out, s):
+    if s is None:
+        out.append(_NONE)
+        return
+    code = _CODE.get(s)
+    if code is not None:
+        out.append(code)
+        return
+    b = str(s)[:MAX_TEXT].encode("utf-8")
+    out.append(_STR)
+    out += struct.pack("<H", len(b))
+    out += b
+
+def _get(buf, pos):
+    tag = buf[pos]
+    if tag == _NONE:
+        return None, pos + 1
+    if tag != _STR:
+        return _TABLE[tag], pos + 1
+    (n,) = struct.unpack_from("<H", buf, pos + 1)
+    return bytes(buf[pos + 3:pos + 3 + n]).decode("utf-8"), pos + 3 + n
+
+def encode(session, history=()):
+    """Pack a session dict and its last HISTORY (user, bot) turns into bytes."""
+    out = bytearray(struct.pack("<Bh", FORMAT, -1 if session.get("node") is None else session["node"]))
+    for k in _KEYS:
+        _put(out, session.get(k))
+    slots = session.get("slots", {})
+    out.append(len(slots))
+    for k, v in slots.items():
+        _put(out, k)
+        _put(out, v)
+    extra = {k: v for k, v in session.items() if k not in _KEYS and k not in ("slots", "node")}
+    _put(out, json.dumps(extra, separators=(",", ":")) if extra else None)
+    history = list(history)[-HISTORY:]
+    out.append(len(history))
+    for user, bot in history:
+        _put(out, user)
+        _put(out, bot)
+    return bytes(out)
+
+def decode(data):
+    """Inverse of encode(); returns (session, history)."""
+    fmt, node = struct.unpack_from("<Bh", data, 0)
+    if fmt != FORMAT:
+        raise ValueError(f"unknown session format {fmt}")
+    pos = 3
+    s = {}
+    for k in _KEYS:
+        v, pos = _get(data, pos)
+        if v is not None or k in ("stage", "name", "prompt", "model"):
+            s[k] = v
+    s["node"] = None if node < 0 else node
+    slots = {}
+    n = data[pos]
+    pos += 1
+    for _ in range(n):
+        k, pos = _get(data, pos)
+        slots[k], pos = _get(data, pos)
+    s["slots"] = slots
+    extra, pos = _get(data, pos)
+    if extra:
+        s.update(json.loads(extra))
+    history = []
+    n = data[pos]
+    pos += 1
+    for _ in range(n):
+        user, pos = _get(data, pos)
+        bot, pos = _get(data, pos)
+        history.append((user, bot))
+    return s, history
+
+class SessionStore:
+    """Base class: load/save (session, history) by id with TTL expiry.
+
+    Backends implement _read(sid), _write(sid, blob, expires), drop(sid),
+    expire() and __len__."""
+
+    def __init__(self, ttl=900.0):
+        self.ttl = ttl
+
+    def load(self, sid):
+        """(session, history) for `sid`, or (None, []) if unknown or expired."""
+        blob = self._read(sid)
+        if blob is None:
+            return None, []
+        return decode(blob)
+
+    def save(self, sid, session, history=()):
+        self._write(sid, encode(session, history), time.time() + self.ttl)
+
+class MemoryStore(SessionStore):
+    """In-process LRU of packed sessions."""
+
+    def __init__(self, ttl=900.0, maxsize=100_000):
+        super().__init__(ttl)
+        self.maxsize = maxsize
+        self._items = OrderedDict()  # sid -> (blob, expires)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def _read(self, sid):
+        with self._lock:
+            item = self._items.get(sid)
+            if item is None:
+                return None
+            if item[1] < time.time():
+                del self._items[sid]
+                return None
+            self._items.move_to_end(sid)
+            return item[0]
+
+    def _write(self, sid, blob, expires):
+        with self._lock:
+            self._items[sid] = (blob, expires)
+            self._items.move_to_end(sid)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def drop(self, sid):
+        with self._lock:
+            self._items.pop(sid, None)
+
+    def expire(self):
+        now = time.time()
+        with self._lock:
+            stale = [sid for sid, (_, exp) in self._items.items() if exp < now]
+            for sid in stale:
+                del self._items[sid]
+        return len(stale)
+
+class SQLiteStore(SessionStore):
+    """Sessions in one SQLite file in WAL mode: concurrent readers, one writer."""
+
+    def __init__(self, path, ttl=900.0):
+        super().__init__(ttl)
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sessions "
+                         "(sid TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires)")
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions WHERE expires >= ?",
+                                    (time.time(),)).fetchone()[0]
+
+    def _read(self, sid):
+        with self._lock:
+            row = self._db.execute("SELECT data FROM sessions WHERE sid = ? AND expires >= ?",
+                                   (sid, time.time())).fetchone()
+        return row[0] if row else None
+
+    def _write(self, sid, blob, expires):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)",
+                             (sid, blob, expires))
+
+    def drop(self, sid):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def expire(self):
+        with self._lock:
+            return self._db.execute("DELETE FROM sessions WHERE expires < ?", (time.time(),)).rowcount
+
+    def close(self):
+        self._db.close()
+
+def open_store(spec=None, ttl=900.0):
+    """Open "memory" (the default) or "sqlite:<path>"; spec falls back to $LEXUS_SESSION_STORE."""
+    spec = spec or os.environ.get("LEXUS_SESSION_STORE", "memory")
+    if spec == "memory":
+        return MemoryStore(ttl)
+    if spec.startswith("sqlite:"):
+        return SQLiteStore(spec[len("sqlite:"):], ttl)
+    raise ValueError(f"unknown session store {spec!r}")
@@ -0,0 +1,150 @@
+# lexus_tree.py
+# Decision-tree compiler for the recommendation questions.
+#  - Input: the model catalog, the body groups and the question vocabularies
+#  - At every node ask the attribute with the highest information gain
+#    (ties keep the question order), until one model is left
+#  - A combined question takes its answers from several attributes
+#    ("executive, family or fun?"), so one question can settle what would
+#    otherwise take two. The other values of those attributes ("luxury")
+#    are accepted too: they narrow the candidates and the tree asks on
+#  - Output: a flat node table, saved as compact JSON and loaded at startup
+#
+# Rebuild after editing data/catalog.json or data/vocab.json:
+#   python lexus_tree.py
+#
+# Tree layout:
+#   {"signature": str, "roots": {body_key: ref},
+#    "nodes": [[attr, prompt_id, {answer: ref}], ...]}
+# where ref is a node index (int) or a model name (str, a leaf).
+
+import hashlib, json, math, os
+
+TREE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexus_tree.json")
+
+def signature(models, groups, questions, prompts, combined=None):
+    """Fingerprint of everything the tree is compiled from."""
+    src = json.dumps([models, groups, [[a, sorted(v)] for a, v in questions],
+                      sorted(([list(k), v] for k, v in prompts.items()), key=str), combined or {}],
+                     sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(src.encode()).hexdigest()[:16]
+
+def _entropy(catalog, cands):
+    total = cands.bit_count()
+    h = 0.0
+    for bits in catalog.index["name"].values():
+        n = (bits & cands).bit_count()
+        if n:
+            p = n / total
+            h -= p * math.log2(p)
+    return h
+
+def _split(catalog, cands, attr, vocab, combined):
+    """{answer: candidates} for the answers to `attr` that some candidate
+    has, in vocabulary order. The answers of a combined question are
+    (answer, attribute) pairs from the broadest to the most specific; a
+    record that matches several goes under the last one."""
+    conds = combined.get(attr)
+    if conds is None:
+        present = catalog.values(cands, attr)
+        return {v: catalog.narrow(cands, attr, v) for v in vocab if v in present}
+    parts, left = {}, cands
+    for answer, field in reversed(conds):
+        parts[answer] = catalog.narrow(left, field, answer)
+        left &= ~parts[answer]
+    return {v: parts[v] for v in vocab if parts.get(v)}
+
+def _narrowing(catalog, cands, attr, vocab, combined, vocabs):
+    """{answer: candidates} for the answers of combined question `attr`
+    that are not among its own: values of its attributes that only narrow
+    the candidates ("luxury" leaves the executive and the family sedan)."""
+    own = {answer for answer, _ in combined[attr]}
+    fields = list(dict.fromkeys(field for _, field in combined[attr]))
+    out = {}
+    for v in vocab:
+        if v in own:
+            continue
+        field = next((f for f in fields if v in vocabs[f]), None)
+        sub = catalog.narrow(cands, field, v) if field else 0
+        if sub:
+            out[v] = sub
+    return out
+
+def _best_question(catalog, cands, questions, asked, combined):
+    best, best_h = None, None
+    total = cands.bit_count()
+    for attr, vocab in questions:
+        if attr in asked:
+            continue
+        subs = _split(catalog, cands, attr, vocab, combined).values()
+        if len(subs) < 2:
+            continue
+        # expected entropy left after the answer
+        h = sum(sub.bit_count() / total * _entropy(catalog, sub) for sub in subs)
+        if best is None or h < best_h - 1e-12:
+            best, best_h = attr, h
+    return best
+
+def _prompt_for(prompts, context, attr):
+    for ctx in reversed(context):
+        pid = prompts.get((ctx, attr))
+        if pid:
+            return pid
+    return prompts[(None, attr)]
+
+def compile_tree(catalog, groups, questions, prompts, sig=None, combined=None):
+    """Compile the question tree.
+
+    groups:    {body_key: (attr, [catalog values])} - which records a body answer covers
+    questions: [(attr, vocabulary mapping)] in tie-break order
+    prompts:   {(context, attr): prompt_id}; context is a body key or an earlier
+               answer, (None, attr) is the fallback
+    combined:  {attr: [(answer, catalog attr)]} for the combined questions
+               among `questions`"""
+    nodes = []
+    combined = combined or {}
+    vocabs = dict(questions)
+
+    def build(cands, asked, context):
+        names = catalog.values(cands, "name")
+        attr = _best_question(catalog, cands, questions, asked, combined) if len(names) > 1 else None
+        if attr is None:
+            return names[0]
+        node = [attr, _prompt_for(prompts, context, attr), {}]
+        nodes.append(node)
+        ref = len(nodes) - 1
+        parts = _split(catalog, cands, attr, vocabs[attr], combined)
+        if attr in combined:
+            parts.update(_narrowing(catalog, cands, attr, vocabs[attr], combined, vocabs))
+        for v, sub in parts.items():
+            node[2][v] = build(sub, asked | {attr}, context + [v])
+        return ref
+
+    roots = {}
+    for key, (attr, values) in groups.items():
+        cands = catalog.narrow_any(catalog.all, attr, values)
+        if cands:
+            roots[key] = build(cands, frozenset(), [key])
+    return {"signature": sig, "roots": roots, "nodes": nodes}
+
+def save_tree(tree, path=TREE_PATH):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(tree, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp, path)
+
+def load_tree(path=TREE_PATH, sig=None):
+    """Return the saved tree, or None if it is missing or built from other inputs."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            tree = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if sig is not None and tree.get("signature") != sig:
+        return None
+    return tree
+
+if __name__ == "__main__":
+    import lexus_dialog_agent_v3 as agent
+    tree = agent.build_tree()
+    save_tree(tree)
+    print(f"Wrote {TREE_PATH}: {len(tree['nodes'])} questions, {len(tree['roots'])} body roots")
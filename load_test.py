@@ -0,0 +1,183 @@
+# load_test.py
+# Local load generator for chat_server.py.
+#  - Replays scripted showroom conversations at a configurable concurrency
+#  - Reports p50/p95/p99 turn latency and completed sessions per second
+#
+#   python load_test.py --serve --sessions 2000 --concurrency 200
+#   python load_test.py --port 8765 --mode ws --sessions 500
+#   python load_test.py --serve --workers 4       # in-process prefork server
+
+import argparse, asyncio, base64, json, os, time
+
+# Scripted conversations: utterances in order, and the model they should reach
+SCRIPTS = {
+    "LS": ["my name is Alex", "yes", "no", "2", "sedan", "luxury", "executive"],
+    "ES": ["I'm Dana", "yes", "yes", "sedan", "luxury", "family"],
+    "RC": ["this is Sam", "yeah", "no", "just me and one friend", "coupe", "sporty"],
+    "GX": ["Chris", "sure", "no", "5 of us", "suv", "mid size", "fun"],
+    "TX": ["my name is Pat", "yes", "no", "six", "crossover", "full-size", "family"],
+    "RZ": ["it's Robin", "yes", "yes", "electric", "yes"],
+}
+
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, round(q / 100 * len(sorted_vals)) - 1))
+    return sorted_vals[i]
+
+# ------------ Clients ------------
+class HttpClient:
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def send(self, msg):
+        body = json.dumps(msg).encode()
+        self.writer.write(b"POST /chat HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\n"
+                          b"Content-Length: %d\r\n\r\n" % (self.host.encode(), len(body)) + body)
+        await self.reader.readline()
+        n = 0
+        while True:
+            h = await self.reader.readline()
+            if h in (b"\r\n", b""):
+                break
+            k, _, v = h.partition(b":")
+            if k.strip().lower() == b"content-length":
+                n = int(v)
+        return json.loads(await self.reader.readexactly(n))
+
+    async def open(self):
+        return await self.send({})
+
+    async def turn(self, sid, text):
+        return await self.send({"session": sid, "text": text})
+
+    async def close(self):
+        self.writer.close()
+
+class WsClient:
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+
+    async def connect(self):
+        pass
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        key = base64.b64encode(os.urandom(16))
+        self.writer.write(b"GET /ws HTTP/1.1\r\nHost: %s\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                          b"Sec-WebSocket-Key: %s\r\nSec-WebSocket-Version: 13\r\n\r\n" % (self.host.encode(), key))
+        while (await self.reader.readline()) not in (b"\r\n", b""):
+            pass
+        return await self._recv()
+
+    async def _recv(self):
+        _, b1 = await self.reader.readexactly(2)
+        n = b1 & 0x7F
+        if n == 126:
+            n = int.from_bytes(await self.reader.readexactly(2), "big")
+        elif n == 127:
+            n = int.from_bytes(await self.reader.readexactly(8), "big")
+        return json.loads(await self.reader.readexactly(n))
+
+    async def turn(self, sid, text):
+        data = text.encode()
+        n = len(data)
+        head = bytes([0x81, 0x80 | n]) if n < 126 else bytes([0x81, 0x80 | 126]) + n.to_bytes(2, "big")
+        # Clients must mask; an all-zero mask keeps the payload as is
+        self.writer.write(head + b"\0\0\0\0" + data)
+        return await self._recv()
+
+    async def close(self):
+        self.writer.close()
+
+# ------------ Runner ------------
+async def _user(client_cls, host, port, scripts, queue, turn_lat, stats):
+    client = client_cls(host, port)
+    await client.connect()
+    try:
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            expected, lines = scripts[i % len(scripts)]
+            res = await client.open()
+            sid = res["session"]
+            for line in lines:
+                t0 = time.perf_counter()
+                res = await client.turn(sid, line)
+                turn_lat.append(time.perf_counter() - t0)
+                if res["done"]:
+                    break
+            if res.get("model") == expected:
+                stats["ok"] += 1
+            else:
+                stats["mismatch"] += 1
+            if client_cls is WsClient:
+                await client.close()
+    finally:
+        if client_cls is HttpClient:
+            await client.close()
+
+async def run(host, port, sessions, concurrency, mode="http", serve=False, pool=None):
+    server = None
+    if pool is not None:
+        from lexus_prefork import PreforkServer
+        server = PreforkServer(pool)
+        host, port = await server.start(host, 0)
+    elif serve:
+        from chat_server import ChatServer
+        server = ChatServer()
+        host, port = await server.start(host, 0)
+    scripts = list(SCRIPTS.items())
+    queue = asyncio.Queue()
+    for i in range(sessions):
+        queue.put_nowait(i)
+    turn_lat, stats = [], {"ok": 0, "mismatch": 0}
+    client_cls = WsClient if mode == "ws" else HttpClient
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_user(client_cls, host, port, scripts, queue, turn_lat, stats)
+                           for _ in range(min(concurrency, sessions))))
+    elapsed = time.perf_counter() - t0
+    if server is not None:
+        await server.close()
+    turn_lat.sort()
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "turns": len(turn_lat),
+        "elapsed_s": round(elapsed, 3),
+        "sessions_per_s": round(sessions / elapsed, 1),
+        "turns_per_s": round(len(turn_lat) / elapsed, 1),
+        "p50_ms": round(percentile(turn_lat, 50) * 1000, 3),
+        "p95_ms": round(percentile(turn_lat, 95) * 1000, 3),
+        "p99_ms": round(percentile(turn_lat, 99) * 1000, 3),
+        **stats,
+    }
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Replay scripted conversations against chat_server.py")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--mode", choices=["http", "ws"], default="http")
+    p.add_argument("--sessions", type=int, default=1000)
+    p.add_argument("--concurrency", type=int, default=100)
+    p.add_argument("--serve", action="store_true", help="start an in-process server on a free port")
+    p.add_argument("--workers", type=int, default=0, help="with --serve: fork this many dialog workers")
+    p.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = p.parse_args()
+    pool = None
+    if args.serve and args.workers > 0:
+        from lexus_prefork import WorkerPool
+        pool = WorkerPool(args.workers).start()  # before the event loop exists
+    report = asyncio.run(run(args.host, args.port, args.sessions, args.concurrency, args.mode, args.serve, pool))
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for k, v in report.items():
+            print(f"{k:>15}: {v}")
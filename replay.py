@@ -0,0 +1,101 @@
+# replay.py
+# Batch/offline transcript replay.
+#  - Streams a JSONL file of conversations through reply(), no input()/print()
+#  - Fans chunks of lines out to a process pool, keeping only a bounded
+#    window in flight, so memory stays flat on multi-gigabyte logs
+#  - Writes one JSONL result per conversation, in input order
+#
+# Input line:  {"id": "...", "turns": ["my name is Ann", "yes", ...]}
+#              (turns may also be objects with a "text" field; an optional
+#              "seed" fixes the prompt wording, an optional "locale" ("es",
+#              "fr") picks the language pack answers are read with)
+# Output line: {"id", "model", "stage", "path": [...],
+#               "turns": [{"stage", "text", "parsed": {slot: value}}]}
+#
+#   python replay.py conversations.jsonl -o results.jsonl --workers 8
+#   cat conversations.jsonl | python replay.py - > results.jsonl
+
+import argparse, json, os, sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from lexus_dialog_agent_v3 import reply, stage_label as _stage, start
+
+def replay_conversation(conv):
+    """Run one conversation dict; returns its result record."""
+    _, s = start(seed=conv.get("seed"), locale=conv.get("locale"))
+    path = [_stage(s)]
+    turns = []
+    for t in conv.get("turns", []):
+        text = t.get("text", "") if isinstance(t, dict) else str(t)
+        before_stage, before_slots, before_name = _stage(s), s["slots"], s["name"]
+        _, s = reply(s, text)
+        parsed = {k: v for k, v in s["slots"].items() if before_slots.get(k) != v}
+        if s["name"] != before_name:
+            parsed["name"] = s["name"]
+        turns.append({"stage": before_stage, "text": text, "parsed": parsed})
+        if s["stage"] == "done":
+            break
+        path.append(_stage(s))
+    return {"id": conv.get("id"), "model": s["model"], "stage": s["stage"],
+            "path": path, "turns": turns}
+
+def _replay_chunk(lines):
+    out = []
+    for line in lines:
+        try:
+            out.append(json.dumps(replay_conversation(json.loads(line)), ensure_ascii=False))
+        except (ValueError, AttributeError, TypeError) as e:
+            out.append(json.dumps({"error": str(e), "line": line[:200]}))
+    return out
+
+def _chunks(f, size):
+    lines = (l for l in f if l.strip())
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+def replay_file(src, dst, workers=None, chunk_size=500):
+    """Replay every conversation in the open file `src` into `dst`; returns the count."""
+    workers = workers or os.cpu_count() or 1
+    n = 0
+    if workers == 1:
+        for chunk in _chunks(src, chunk_size):
+            for rec in _replay_chunk(chunk):
+                dst.write(rec + "\n")
+                n += 1
+        return n
+    window = deque()
+    with ProcessPoolExecutor(workers) as pool:
+        for chunk in _chunks(src, chunk_size):
+            window.append(pool.submit(_replay_chunk, chunk))
+            if len(window) >= workers * 2:
+                for rec in window.popleft().result():
+                    dst.write(rec + "\n")
+                    n += 1
+        while window:
+            for rec in window.popleft().result():
+                dst.write(rec + "\n")
+                n += 1
+    return n
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Replay logged conversations through the dialog engine")
+    p.add_argument("input", help="JSONL file of conversations, or - for stdin")
+    p.add_argument("-o", "--output", default="-", help="JSONL results file (default stdout)")
+    p.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    p.add_argument("--chunk-size", type=int, default=500, help="conversations per task")
+    args = p.parse_args()
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        count = replay_file(src, dst, args.workers, args.chunk_size)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    print(f"replayed {count} conversations", file=sys.stderr)
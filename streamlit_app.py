@@ -1,19 +1,70 @@
+import secrets
+
 import streamlit as st
-from lexus_dialog_agent_v3.py import reply
+from lexus_store import HISTORY, open_store
 
 st.set_page_config(page_title="Rule-Based Chatbot", page_icon="💬")
 st.title("Rule-Based Chatbot")
 
-if "history" not in st.session_state:
-    st.session_state.history = []
+# (user, bot) turns kept and drawn per tab, so a rerun costs the same
+# however long the chat gets; the same window the session store keeps, so a
+# reload shows what the tab showed
+WINDOW = HISTORY
+
+# Built once per server process and shared by every tab: the dialog engine
+# with its compiled matchers, and the session store
+# (LEXUS_SESSION_STORE=sqlite:sessions.db to share it between workers).
+@st.cache_resource
+def engine():
+    import lexus_dialog_agent_v3 as agent
+    agent.KB.warm()
+    return agent
+
+@st.cache_resource
+def session_store():
+    return open_store()
+
+agent = engine()
+store = session_store()
+agent.reload_data()  # cheap stat check; swaps in edited data files
+
+# Per-tab state: the dialog and its recent messages stay in st.session_state;
+# the store is read only when a tab opens (or the page reloads) and written
+# once per message. The session id is kept in the URL so a reload, or
+# another worker, resumes the same conversation. The count of turns that
+# fell out of the window is saved alongside the dialog as "hidden".
+if "dialog" not in st.session_state:
+    sid = st.query_params.get("sid")
+    dialog, history = store.load(sid) if sid else (None, [])
+    hidden = dialog.pop("hidden", 0) if dialog is not None else 0
+    if dialog is None:
+        # ?lang=es / ?lang=fr: also understand answers in that language
+        lang = st.query_params.get("lang")
+        greeting, dialog = agent.start(locale=lang if lang in agent.locales() else None)
+        history = [(None, greeting)]
+        sid = secrets.token_hex(8)
+        store.save(sid, dialog, history)
+    st.query_params["sid"] = sid
+    st.session_state.sid = sid
+    st.session_state.dialog = dialog
+    st.session_state.history = history
+    st.session_state.hidden = hidden
 
-for user, bot in st.session_state.history:
-    st.chat_message("user").markdown(user)
+history = st.session_state.history
+if st.session_state.hidden:
+    st.caption(f"{st.session_state.hidden} earlier turns hidden")
+for user, bot in history:
+    if user is not None:
+        st.chat_message("user").markdown(user)
     st.chat_message("assistant").markdown(bot)
 
 prompt = st.chat_input("Type your message...")
 if prompt:
-    bot_answer = reply(prompt)
-    st.session_state.history.append((prompt, bot_answer))
+    bot_answer, st.session_state.dialog = agent.reply(st.session_state.dialog, prompt)
+    history.append((prompt, bot_answer))
+    if len(history) > WINDOW:
+        st.session_state.hidden += len(history) - WINDOW
+        del history[:-WINDOW]
+    store.save(st.session_state.sid, {**st.session_state.dialog, "hidden": st.session_state.hidden}, history)
     st.chat_message("user").markdown(prompt)
     st.chat_message("assistant").markdown(bot_answer)